@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Minimal stand-in for the rclone commands used by the SCOPE_HN scripts.
+
+Serves `gdrive:` paths from the local directory in $FAKE_RCLONE_ROOT so the
+validation and cleanup scripts can be benchmarked without a Google Drive
+remote. Supported commands:
+
+    rclone lsf <path> [--dirs-only]
+    rclone lsjson [-R] [--files-only] [--no-mimetype] <path>
+    rclone delete <path>
+
+run_benchmarks.py puts a `rclone` shim for this file first on PATH.
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+def local_path(remote_path):
+    """Map a `gdrive:/...` path onto $FAKE_RCLONE_ROOT."""
+    _, _, path = remote_path.partition(':')
+    return os.path.join(os.environ['FAKE_RCLONE_ROOT'], path.lstrip('/'))
+
+def lsf(path, dirs_only=False):
+    with os.scandir(path) as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            if entry.is_dir():
+                print(f"{entry.name}/")
+            elif not dirs_only:
+                print(entry.name)
+
+def _json_entry(rel_path, entry):
+    stat = entry.stat()
+    return json.dumps({
+        'Path': rel_path,
+        'Name': entry.name,
+        'Size': -1 if entry.is_dir() else stat.st_size,
+        'ModTime': datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat().replace('+00:00', 'Z'),
+        'IsDir': entry.is_dir(),
+    })
+
+def lsjson(path, recursive=False, files_only=False):
+    # Same framing as rclone: one object per line between brackets
+    out = sys.stdout
+    out.write('[\n')
+    first = True
+    stack = [('', path)]
+    while stack:
+        prefix, directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                rel_path = f"{prefix}{entry.name}"
+                if entry.is_dir() and recursive:
+                    stack.append((f"{rel_path}/", entry.path))
+                if entry.is_dir() and files_only:
+                    continue
+                out.write(('' if first else ',\n') + _json_entry(rel_path, entry))
+                first = False
+    out.write('\n]\n')
+
+def main(argv):
+    if not argv:
+        print("fake_rclone: missing command", file=sys.stderr)
+        return 1
+    command, args = argv[0], argv[1:]
+    flags = {a for a in args if a.startswith('-')}
+    paths = [a for a in args if not a.startswith('-')]
+    if not paths:
+        print(f"fake_rclone: {command} needs a path", file=sys.stderr)
+        return 1
+    path = local_path(paths[0])
+
+    if not os.path.exists(path):
+        print(f"fake_rclone: directory not found: {paths[0]}", file=sys.stderr)
+        return 3
+    if command == 'lsf':
+        lsf(path, dirs_only='--dirs-only' in flags)
+    elif command == 'lsjson':
+        lsjson(path, recursive='-R' in flags or '--recursive' in flags, files_only='--files-only' in flags)
+    elif command == 'delete':
+        os.remove(path)
+    else:
+        print(f"fake_rclone: unsupported command {command}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Scale benchmarks for the SCOPE_HN validation and cleanup scripts.
+
+For each scale factor a synthetic dataset (106 patients, ~942 frames at 1x)
+is generated and served through a stand-in for the `gdrive:` rclone remote.
+The harness then times:
+1. find_image_mask_discrepancy.py (per-patient listing and --manifest)
+2. remove_unmatched_images.py --dry-run
+3. examples/dataset_validation_example.py (cache rebuilt with --full)
+
+Results are written as JSON so runs can be compared for regressions.
+
+Usage:
+    python run_benchmarks.py --scales 1,10,100 --output results.json
+    python run_benchmarks.py --backend rclone   # real rclone, alias remote
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from synthetic_dataset import generate_dataset, parse_size
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+SCRIPTS_DIR = os.path.join(REPO_DIR, 'scripts')
+EXAMPLES_DIR = os.path.join(REPO_DIR, 'examples')
+
+BASE_PATIENTS = 106
+BASE_FRAMES = 8.9
+
+BENCHMARKS = [
+    ('find_image_mask_discrepancy', 'per-patient',
+     [os.path.join(SCRIPTS_DIR, 'find_image_mask_discrepancy.py')]),
+    ('find_image_mask_discrepancy', 'manifest',
+     [os.path.join(SCRIPTS_DIR, 'find_image_mask_discrepancy.py'), '--manifest']),
+    ('remove_unmatched_images', 'dry-run',
+     [os.path.join(SCRIPTS_DIR, 'remove_unmatched_images.py'), '--dry-run']),
+    ('dataset_validation_example', 'full',
+     [os.path.join(EXAMPLES_DIR, 'dataset_validation_example.py'), '--full']),
+]
+
+def remote_env(remote_root, backend, bin_dir):
+    """Environment that points the `gdrive:` remote at a local directory."""
+    env = dict(os.environ)
+    if backend == 'fake':
+        shim = os.path.join(bin_dir, 'rclone')
+        with open(shim, 'w') as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(BENCHMARK_DIR, "fake_rclone.py")}" "$@"\n')
+        os.chmod(shim, 0o755)
+        env['PATH'] = bin_dir + os.pathsep + env.get('PATH', '')
+        env['FAKE_RCLONE_ROOT'] = remote_root
+    else:
+        # rclone reads remotes from RCLONE_CONFIG_<NAME>_* variables
+        env['RCLONE_CONFIG_GDRIVE_TYPE'] = 'alias'
+        env['RCLONE_CONFIG_GDRIVE_REMOTE'] = remote_root
+    return env
+
+def time_command(command, env, cwd, timeout):
+    """Run one benchmark command and return (seconds, returncode)."""
+    start = time.perf_counter()
+    try:
+        result = subprocess.run([sys.executable] + command, env=env, cwd=cwd, timeout=timeout,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        returncode = result.returncode
+    except subprocess.TimeoutExpired:
+        returncode = None
+    return time.perf_counter() - start, returncode
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SCOPE_HN scripts on synthetic data")
+    parser.add_argument('--scales', default='1,10,100', help="Comma-separated dataset scale factors")
+    parser.add_argument('--backend', choices=['fake', 'rclone'], default='fake',
+                        help="Serve the remote with the in-process fake or real rclone (alias backend)")
+    parser.add_argument('--image-size', type=parse_size, default=None,
+                        help="Write real images/masks of this size, e.g. 1920x1080 (default: placeholders)")
+    parser.add_argument('--mismatch-rate', type=float, default=0.01, help="Fraction of unpaired frames")
+    parser.add_argument('--only', default=None,
+                        help="Comma-separated benchmark names to run (e.g. find_image_mask_discrepancy)")
+    parser.add_argument('--timeout', type=float, default=3600, help="Per-command timeout in seconds")
+    parser.add_argument('--output', default=os.path.join(BENCHMARK_DIR, 'results.json'),
+                        help="JSON results file")
+    args = parser.parse_args()
+
+    if args.backend == 'rclone' and shutil.which('rclone') is None:
+        parser.error("--backend rclone needs rclone on PATH")
+
+    selected = set(args.only.split(',')) if args.only else None
+    scales = [int(s) for s in args.scales.split(',')]
+    results = []
+
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix=f"scope_bench_{scale}x_") as work_dir:
+            remote_root = os.path.join(work_dir, 'remote')
+            bin_dir = os.path.join(work_dir, 'bin')
+            run_dir = os.path.join(work_dir, 'run')
+            os.makedirs(bin_dir)
+            os.makedirs(run_dir)
+
+            start = time.perf_counter()
+            _, stats = generate_dataset(remote_root, BASE_PATIENTS * scale, BASE_FRAMES,
+                                        args.image_size, args.mismatch_rate)
+            print(f"[{scale}x] generated {stats['patients']} patients, {stats['images']} images, "
+                  f"{stats['masks']} masks in {time.perf_counter() - start:.1f}s")
+
+            env = remote_env(remote_root, args.backend, bin_dir)
+            for name, mode, command in BENCHMARKS:
+                if selected and name not in selected:
+                    continue
+                seconds, returncode = time_command(command, env, run_dir, args.timeout)
+                status = 'timeout' if returncode is None else f"exit {returncode}"
+                print(f"[{scale}x] {name} ({mode}): {seconds:.2f}s ({status})")
+                results.append({
+                    'benchmark': name,
+                    'mode': mode,
+                    'scale': scale,
+                    'patients': stats['patients'],
+                    'images': stats['images'],
+                    'masks': stats['masks'],
+                    'seconds': round(seconds, 4),
+                    'returncode': returncode,
+                })
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'backend': args.backend,
+        'image_size': list(args.image_size) if args.image_size else None,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic SCOPE_HN tree for benchmarking.
+
+The tree mirrors the Google Drive layout used by the scripts:
+
+    <out>/Rau_So_Segmentation_Dataset/SCOPE_HN/{patient}/images/SCOPE_HN_{patient}_{n}.jpg
+    <out>/Rau_So_Segmentation_Dataset/SCOPE_HN/{patient}/masks/SCOPE_HN_{patient}_{n}.png
+
+By default files are small placeholders, which is enough for the listing and
+pairing benchmarks. Pass --image-size to write real JPEG frames and PNG
+class-index masks (requires numpy and PIL).
+
+Usage:
+    python synthetic_dataset.py /tmp/scope_synth --patients 106 --frames 8.9
+"""
+
+import argparse
+import os
+import random
+
+DATASET_SUBDIR = os.path.join("Rau_So_Segmentation_Dataset", "SCOPE_HN")
+NUM_CLASSES = 12
+
+def _write_placeholder(path, size):
+    with open(path, 'wb') as f:
+        f.write(b'\0' * size)
+
+def _write_image_pair(image_path, mask_path, width, height, rng):
+    import numpy as np
+    from PIL import Image
+
+    np_rng = np.random.default_rng(rng.randrange(2 ** 32))
+    frame = np_rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    Image.fromarray(frame).save(image_path, quality=90)
+
+    # Blocky class layout so masks compress like real annotations
+    blocks = np_rng.integers(1, NUM_CLASSES + 1, (8, 8), dtype=np.uint8)
+    mask = np.kron(blocks, np.ones((height // 8 + 1, width // 8 + 1), dtype=np.uint8))[:height, :width]
+    Image.fromarray(mask).save(mask_path)
+
+def generate_dataset(out_root, patients=106, frames=8.9, image_size=None, mismatch_rate=0.01, seed=0):
+    """
+    Write a synthetic dataset and return its SCOPE_HN root.
+
+    frames is the mean number of frames per patient (the real dataset has
+    942 frames over 106 patients). mismatch_rate is the fraction of frames
+    that get an image without a mask, or a mask without an image. Patients
+    014 and 022 always get the orphaned images that remove_unmatched_images.py
+    targets, when they exist.
+    """
+    rng = random.Random(seed)
+    root = os.path.join(out_root, DATASET_SUBDIR)
+    stats = {'patients': patients, 'images': 0, 'masks': 0}
+
+    for p in range(1, patients + 1):
+        patient_id = f"{p:03d}"
+        images_dir = os.path.join(root, patient_id, 'images')
+        masks_dir = os.path.join(root, patient_id, 'masks')
+        os.makedirs(images_dir, exist_ok=True)
+        os.makedirs(masks_dir, exist_ok=True)
+
+        n_frames = max(1, round(rng.gauss(frames, frames / 3)))
+        for n in range(1, n_frames + 1):
+            stem = f"SCOPE_HN_{patient_id}_{n}"
+            image_path = os.path.join(images_dir, f"{stem}.jpg")
+            mask_path = os.path.join(masks_dir, f"{stem}.png")
+
+            roll = rng.random()
+            write_image = roll >= mismatch_rate / 2
+            write_mask = roll < mismatch_rate / 2 or roll >= mismatch_rate
+
+            if image_size and write_image and write_mask:
+                _write_image_pair(image_path, mask_path, image_size[0], image_size[1], rng)
+            else:
+                if write_image:
+                    _write_placeholder(image_path, 64)
+                if write_mask:
+                    _write_placeholder(mask_path, 32)
+            stats['images'] += write_image
+            stats['masks'] += write_mask
+
+        if patient_id in ('014', '022'):
+            orphan = {'014': 2, '022': 7}[patient_id]
+            orphan_stem = f"SCOPE_HN_{patient_id}_{orphan}"
+            orphan_mask = os.path.join(masks_dir, f"{orphan_stem}.png")
+            if os.path.exists(orphan_mask):
+                os.remove(orphan_mask)
+                stats['masks'] -= 1
+            orphan_image = os.path.join(images_dir, f"{orphan_stem}.jpg")
+            if not os.path.exists(orphan_image):
+                _write_placeholder(orphan_image, 64)
+                stats['images'] += 1
+
+    return root, stats
+
+def parse_size(text):
+    """Parse a WIDTHxHEIGHT string."""
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic SCOPE_HN dataset tree")
+    parser.add_argument('out', help="Output directory (acts as the root of the fake remote)")
+    parser.add_argument('--patients', type=int, default=106, help="Number of patients")
+    parser.add_argument('--frames', type=float, default=8.9, help="Mean frames per patient")
+    parser.add_argument('--image-size', type=parse_size, default=None,
+                        help="Write real images/masks of this size, e.g. 1920x1080 (default: placeholders)")
+    parser.add_argument('--mismatch-rate', type=float, default=0.01, help="Fraction of unpaired frames")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    root, stats = generate_dataset(args.out, args.patients, args.frames, args.image_size,
+                                   args.mismatch_rate, args.seed)
+    print(f"Generated {stats['patients']} patients, {stats['images']} images, {stats['masks']} masks in {root}")
+
+if __name__ == "__main__":
+    main()
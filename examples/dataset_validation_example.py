@@ -6,32 +6,60 @@ This example demonstrates how to validate the SCOPE-HN dataset integrity
 and generate a summary report of the dataset statistics.
 """
 
+import argparse
 import sys
 import os
+import time
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
 
 from find_image_mask_discrepancy import *
+from validation_cache import DEFAULT_CACHE_PATH, cached_discrepancies
+from class_histograms import DEFAULT_STORE_PATH, CLASS_NAMES, class_distribution, load_class_histograms
 
-def generate_dataset_summary():
-    """Generate a comprehensive summary of the SCOPE-HN dataset."""
-    print("=" * 60)
-    print("SCOPE-HN DATASET VALIDATION AND SUMMARY")
-    print("=" * 60)
+def generate_dataset_summary(root=REMOTE_ROOT, cache_path=None, full=False, output_format='text'):
+    """Generate a comprehensive summary of the SCOPE-HN dataset.
     
-    # Get all patient directories
-    patients = get_patient_directories()
-    print(f"📊 Found {len(patients)} patient directories")
+    With output_format 'json' or 'csv' nothing is printed; the returned
+    summary carries a machine-readable 'report' with per-stage timings.
+    """
+    log = print if output_format == 'text' else (lambda *args, **kwargs: None)
+    timer = StageTimer()
+    
+    log("=" * 60)
+    log("SCOPE-HN DATASET VALIDATION AND SUMMARY")
+    log("=" * 60)
+    
+    # One recursive listing serves every per-patient lookup below
+    with timer.stage('listing'):
+        index = build_dataset_index(root)
+        
+        # Get all patient directories
+        patients = get_patient_directories(index)
+    log(f"📊 Found {len(patients)} patient directories")
+    
+    # With a cache, only patients whose listing changed are re-checked
+    cached_results = None
+    if cache_path:
+        with timer.stage('pairing'):
+            cached_results, rechecked = cached_discrepancies(index, cache_path, full=full)
+        log(f"♻️  Re-checked {len(rechecked)} patients, {len(patients) - len(rechecked)} served from cache")
     
     total_images = 0
     total_masks = 0
     total_matches = 0
     patients_with_issues = []
     patient_stats = []
+    analyses = {}
     
-    print("\n🔍 Analyzing each patient...")
+    log("\n🔍 Analyzing each patient...")
     for patient_id in sorted(patients):
         try:
-            analysis = find_discrepancies_by_patient(patient_id)
+            with timer.stage('pairing'):
+                if cached_results is not None:
+                    analysis = cached_results[patient_id]
+                else:
+                    analysis = find_discrepancies_by_patient(patient_id, index)
+            analyses[patient_id] = analysis
             
             total_images += analysis['total_images']
             total_masks += analysis['total_masks']
@@ -49,40 +77,43 @@ def generate_dataset_summary():
                 patients_with_issues.append(patient_id)
                 
         except Exception as e:
-            print(f"❌ Error analyzing patient {patient_id}: {e}")
+            log(f"❌ Error analyzing patient {patient_id}: {e}")
+            analyses[patient_id] = {'error': str(e)}
             patients_with_issues.append(patient_id)
     
+    reporting_start = time.perf_counter()
+    
     # Generate summary statistics
-    print("\n" + "=" * 60)
-    print("DATASET SUMMARY")
-    print("=" * 60)
+    log("\n" + "=" * 60)
+    log("DATASET SUMMARY")
+    log("=" * 60)
     
-    print(f"📈 Total Statistics:")
-    print(f"   • Patients: {len(patients)}")
-    print(f"   • Images: {total_images}")
-    print(f"   • Masks: {total_masks}")
-    print(f"   • Perfect Matches: {total_matches}")
+    log(f"📈 Total Statistics:")
+    log(f"   • Patients: {len(patients)}")
+    log(f"   • Images: {total_images}")
+    log(f"   • Masks: {total_masks}")
+    log(f"   • Perfect Matches: {total_matches}")
     
-    print(f"\n✅ Quality Metrics:")
+    log(f"\n✅ Quality Metrics:")
     perfect_patients = len(patients) - len(patients_with_issues)
-    print(f"   • Patients with perfect matches: {perfect_patients}/{len(patients)} ({perfect_patients/len(patients)*100:.1f}%)")
-    print(f"   • Overall completion rate: {total_matches/total_images*100:.1f}%")
+    log(f"   • Patients with perfect matches: {perfect_patients}/{len(patients)} ({perfect_patients/len(patients)*100:.1f}%)")
+    log(f"   • Overall completion rate: {total_matches/total_images*100:.1f}%")
     
     if patients_with_issues:
-        print(f"\n⚠️  Patients requiring attention: {len(patients_with_issues)}")
+        log(f"\n⚠️  Patients requiring attention: {len(patients_with_issues)}")
         for patient_id in patients_with_issues:
-            print(f"   • Patient {patient_id}")
+            log(f"   • Patient {patient_id}")
     else:
-        print(f"\n🎉 All patients have perfect image-mask matching!")
+        log(f"\n🎉 All patients have perfect image-mask matching!")
     
     # Distribution analysis
     image_counts = [p['images'] for p in patient_stats]
-    print(f"\n📊 Image Distribution:")
-    print(f"   • Min images per patient: {min(image_counts)}")
-    print(f"   • Max images per patient: {max(image_counts)}")
-    print(f"   • Average images per patient: {sum(image_counts)/len(image_counts):.1f}")
+    log(f"\n📊 Image Distribution:")
+    log(f"   • Min images per patient: {min(image_counts)}")
+    log(f"   • Max images per patient: {max(image_counts)}")
+    log(f"   • Average images per patient: {sum(image_counts)/len(image_counts):.1f}")
     
-    return {
+    summary = {
         'total_patients': len(patients),
         'total_images': total_images,
         'total_masks': total_masks,
@@ -90,11 +121,59 @@ def generate_dataset_summary():
         'perfect_patients': perfect_patients,
         'patients_with_issues': patients_with_issues
     }
+    
+    if output_format != 'text':
+        summary['report'] = build_report(analyses, timer)
+        summary['report']['timings']['stages']['reporting'] = time.perf_counter() - reporting_start
+    
+    return summary
+
+def print_class_distributions(store_path=DEFAULT_STORE_PATH):
+    """Print class pixel distributions from a precomputed histogram store."""
+    store = load_class_histograms(store_path)
+    if store is None:
+        print(f"\nℹ️  No class histogram store at {store_path}")
+        print("   Run scripts/class_histograms.py on a local copy to create it.")
+        return None
+    
+    def print_distribution(counts, indent):
+        total = counts.sum()
+        for name, count in zip(CLASS_NAMES, counts):
+            share = count / total * 100 if total else 0.0
+            print(f"{indent}• {name:<16} {share:5.1f}%")
+    
+    print(f"\n🎨 Class Distribution ({len(store['image_ids'])} masks):")
+    print_distribution(class_distribution(store), "   ")
+    
+    print(f"\n🎨 Class Distribution by Patient:")
+    for patient_id in sorted(set(store['patient_ids'].tolist())):
+        print(f"   Patient {patient_id}:")
+        print_distribution(class_distribution(store, patient_id), "      ")
+    
+    return store
 
 def main():
     """Main function to run the dataset validation example."""
+    parser = argparse.ArgumentParser(description="Validate the SCOPE-HN dataset and summarize it")
+    parser.add_argument('root', nargs='?', default=REMOTE_ROOT,
+                        help="rclone remote path or local copy of the dataset")
+    parser.add_argument('--full', action='store_true', help="Rebuild the validation cache")
+    parser.add_argument('--format', choices=['text', 'json', 'csv'], default='text',
+                        help="Report format: human-readable text, or JSON/CSV with per-stage timings")
+    args = parser.parse_args()
+    
+    if args.format != 'text':
+        try:
+            summary = generate_dataset_summary(args.root, DEFAULT_CACHE_PATH, args.full, args.format)
+        except Exception as e:
+            print(f"Validation failed with error: {e}", file=sys.stderr)
+            return 1
+        write_report(summary['report'], args.format)
+        return 1 if summary['patients_with_issues'] else 0
+    
     try:
-        summary = generate_dataset_summary()
+        summary = generate_dataset_summary(args.root, DEFAULT_CACHE_PATH, full=args.full)
+        print_class_distributions()
         
         print("\n" + "=" * 60)
         print("VALIDATION COMPLETE")
@@ -1,16 +1,66 @@
 #!/usr/bin/env python3
 """
 Apply PHI redaction to videos using existing coordinate files.
+
+A coordinate file holds either a single box, {"coordinates": [x1, y1, x2, y2]},
+or a list of regions, each with an optional time window in seconds:
+
+    {"regions": [{"coordinates": [x1, y1, x2, y2]},
+                 {"coordinates": [x1, y1, x2, y2], "start": 12.0, "end": 95.5}]}
+
+All regions are drawn in one filter chain, so any number of them costs a
+single encode.
+
+With --jobs N, up to N ffmpeg encodes run concurrently, each limited to an
+equal share of the CPU cores via -threads. Videos are scheduled largest
+file first so a long video does not start last and stretch the run.
+
+Completed encodes are recorded in a job ledger in the output directory,
+keyed on the SHA-256 of the input video, of the redaction filter and of the
+encoder settings. Re-running skips videos whose ledger entry still matches,
+so an interrupted pass resumes where it stopped and only videos whose
+coordinate file changed are re-encoded. Outputs are written to a temporary
+file and renamed into place once ffmpeg succeeds.
 """
 
+import argparse
+import fnmatch
+import hashlib
 import os
 import json
+import re
 import subprocess
 import glob
+import threading
+import time
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
 
+from video_catalog import DEFAULT_CATALOG_PATH, VideoCatalog
+
+def parse_region(region):
+    """Convert a {'coordinates': [x1, y1, x2, y2], 'start', 'end'} entry to x/y/width/height form."""
+    coords = region.get('coordinates', [])
+    if len(coords) != 4:
+        return None
+    # Convert from [x1, y1, x2, y2] to [x, y, width, height]
+    x1, y1, x2, y2 = coords
+    return {
+        'x': min(x1, x2),
+        'y': min(y1, y2),
+        'width': abs(x2 - x1),
+        'height': abs(y2 - y1),
+        'start': region.get('start'),
+        'end': region.get('end'),
+    }
+
 def load_coordinate_files(coords_dir):
-    """Load all coordinate files and create mapping."""
+    """
+    Load all coordinate files and create mapping.
+
+    Each entry has a 'regions' list; x/y/width/height give the box that
+    encloses every region.
+    """
     coordinates = {}
     
     coord_files = glob.glob(os.path.join(coords_dir, "*_phi_coords.json"))
@@ -24,26 +74,32 @@ def load_coordinate_files(coords_dir):
             filename = os.path.basename(coord_file)
             number = filename.split('_')[0]
             
-            # Get coordinates
-            coords = data.get('coordinates', [])
-            if len(coords) == 4:
-                # Convert from [x1, y1, x2, y2] to [x, y, width, height]
-                x1, y1, x2, y2 = coords
-                x = min(x1, x2)
-                y = min(y1, y2)
-                width = abs(x2 - x1)
-                height = abs(y2 - y1)
+            # Get coordinates: a list of regions, or the original single box
+            raw_regions = data.get('regions')
+            if raw_regions is None:
+                raw_regions = [{'coordinates': data.get('coordinates', [])}]
+            regions = [parse_region(region) for region in raw_regions]
+            
+            if regions and all(regions):
+                x = min(r['x'] for r in regions)
+                y = min(r['y'] for r in regions)
+                width = max(r['x'] + r['width'] for r in regions) - x
+                height = max(r['y'] + r['height'] for r in regions) - y
                 
                 coordinates[number] = {
                     'x': x,
                     'y': y,
                     'width': width,
                     'height': height,
-                    'original_coords': coords,
+                    'regions': regions,
+                    'original_coords': data.get('coordinates') or [r.get('coordinates') for r in raw_regions],
                     'folder': data.get('folder', number)
                 }
                 
-                print(f"Loaded coordinates for {number}: x={x}, y={y}, w={width}, h={height}")
+                if len(regions) == 1 and regions[0]['start'] is None and regions[0]['end'] is None:
+                    print(f"Loaded coordinates for {number}: x={x}, y={y}, w={width}, h={height}")
+                else:
+                    print(f"Loaded {len(regions)} region(s) for {number}")
             else:
                 print(f"Warning: Invalid coordinates in {coord_file}")
                 
@@ -52,8 +108,13 @@ def load_coordinate_files(coords_dir):
     
     return coordinates
 
-def find_matching_video(number, video_dir):
-    """Find the video file that matches the coordinate number."""
+def find_matching_video(number, video_dir, catalog=None):
+    """
+    Find the video file that matches the coordinate number.
+
+    With a VideoCatalog the patterns are matched against its cached directory
+    listing instead of globbing the directory once per pattern.
+    """
     # Try different patterns to match the number to video filename
     patterns = [
         f"SCOPE_HN_{number}.mp4",
@@ -62,30 +123,76 @@ def find_matching_video(number, video_dir):
         f"*{int(number):03d}.mp4"
     ]
     
+    names = [os.path.basename(path) for path in catalog.videos(video_dir)] if catalog else None
     for pattern in patterns:
-        matches = glob.glob(os.path.join(video_dir, pattern))
+        if names is not None:
+            matches = [os.path.join(video_dir, name) for name in fnmatch.filter(names, pattern)]
+        else:
+            matches = glob.glob(os.path.join(video_dir, pattern))
         if matches:
             return matches[0]
     
     return None
 
-def apply_redaction_to_video(video_path, output_path, bbox_coords):
+LEDGER_FILENAME = "redaction_ledger.json"
+
+VIDEO_ENCODER_SETTINGS = [
+    '-c:v', 'libx264',  # Re-encode video with H.264
+    '-preset', 'medium',  # Balance between speed and compression
+    '-crf', '23',  # Good quality setting
+]
+
+ENCODER_SETTINGS = ['-c:a', 'copy'] + VIDEO_ENCODER_SETTINGS  # Copy audio if present
+
+def _time_window(start, end, offset=0.0):
+    """ffmpeg expression for start <= t <= end, with times shifted back by offset."""
+    if start is not None and end is not None:
+        return f"between(t,{start - offset},{end - offset})"
+    if start is not None:
+        return f"gte(t,{start - offset})"
+    return f"lte(t,{end - offset})"
+
+def region_active(region, timestamp):
+    """Whether a region's time window (if any) covers a timestamp in seconds."""
+    return ((region.get('start') is None or timestamp >= region['start'])
+            and (region.get('end') is None or timestamp <= region['end']))
+
+def redaction_filter(bbox_coords, offset=0.0):
+    """
+    ffmpeg video filter that draws the black redaction box(es).
+
+    Regions with a time window are only drawn while it is open. offset is the
+    input seek position, since timestamps restart at zero after -ss.
+    """
+    boxes = []
+    for region in bbox_coords.get('regions', [bbox_coords]):
+        x = region['x']
+        y = region['y']
+        width = region['width']
+        height = region['height']
+        box = f'drawbox=x={x}:y={y}:w={width}:h={height}:color=black:t=fill'
+        if region.get('start') is not None or region.get('end') is not None:
+            box += f":enable='{_time_window(region.get('start'), region.get('end'), offset)}'"
+        boxes.append(box)
+    return ','.join(boxes)
+
+def build_redaction_command(video_path, output_path, bbox_coords, threads=None):
+    """Build the ffmpeg command that draws the redaction box and re-encodes the video."""
+    # FFmpeg command to draw black rectangle over specified area
+    cmd = ['ffmpeg', '-y', '-i', video_path, '-vf', redaction_filter(bbox_coords)] + ENCODER_SETTINGS
+    if threads:
+        # Limit encoder threads so concurrent jobs share the machine evenly
+        cmd += ['-threads', str(threads)]
+    cmd.append(output_path)
+    return cmd
+
+def apply_redaction_to_video(video_path, output_path, bbox_coords, threads=None):
     """Apply redaction (black box) to video using ffmpeg."""
     x = bbox_coords['x']
     y = bbox_coords['y']
     width = bbox_coords['width']
     height = bbox_coords['height']
-    
-    # FFmpeg command to draw black rectangle over specified area
-    cmd = [
-        'ffmpeg', '-y', '-i', video_path,
-        '-vf', f'drawbox=x={x}:y={y}:w={width}:h={height}:color=black:t=fill',
-        '-c:a', 'copy',  # Copy audio if present
-        '-c:v', 'libx264',  # Re-encode video with H.264
-        '-preset', 'medium',  # Balance between speed and compression
-        '-crf', '23',  # Good quality setting
-        output_path
-    ]
+    cmd = build_redaction_command(video_path, output_path, bbox_coords, threads)
     
     try:
         print(f"  Processing: {os.path.basename(video_path)}")
@@ -101,11 +208,208 @@ def apply_redaction_to_video(video_path, output_path, bbox_coords):
             print(f"  Error details: {e.stderr[:200]}...")
         return False
 
+def threads_per_job(jobs, cpu_count=None):
+    """Split the available cores evenly between concurrent ffmpeg processes."""
+    return max(1, (cpu_count or os.cpu_count() or 1) // max(1, jobs))
+
+def _encoded_frames(stderr):
+    """Frame count from the last ffmpeg progress line, or 0 if none was printed."""
+    matches = re.findall(r'frame=\s*(\d+)', stderr or '')
+    return int(matches[-1]) if matches else 0
+
+def _temp_output_path(output_path):
+    """Temporary path next to the output; keeps the extension so ffmpeg picks the muxer."""
+    root, ext = os.path.splitext(output_path)
+    return f"{root}.partial{ext}"
+
+def run_redaction_job(video_path, output_path, bbox_coords, threads=None):
+    """Redact one video and return a result dict with timing and throughput inputs."""
+    result = {
+        'video': os.path.basename(video_path),
+        'output': output_path,
+        'success': False,
+        'skipped': False,
+        'frames': 0,
+        'input_bytes': os.path.getsize(video_path),
+        'output_bytes': 0,
+        'seconds': 0.0,
+        'error': None,
+    }
+    temp_path = _temp_output_path(output_path)
+    cmd = build_redaction_command(video_path, temp_path, bbox_coords, threads)
+    start = time.perf_counter()
+    try:
+        completed = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        # Only a finished encode ever appears under the final name
+        os.replace(temp_path, output_path)
+        result['success'] = True
+        result['frames'] = _encoded_frames(completed.stderr)
+        result['output_bytes'] = os.path.getsize(output_path)
+    except subprocess.CalledProcessError as e:
+        result['error'] = (e.stderr or str(e)).strip()[-200:]
+    except OSError as e:
+        result['error'] = str(e)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def _redaction_task(task):
+    """Run one encode; hash the input alongside it when the ledger has no usable hash."""
+    video_path, output_path, bbox_coords, threads, video_sha256 = task
+    stat = os.stat(video_path)
+    hashed = {}
+    hasher = None
+    if video_sha256 is None:
+        # Hashing reads the file while ffmpeg is busy encoding, so it adds no extra pass
+        hasher = threading.Thread(target=lambda: hashed.update(sha256=file_sha256(video_path)))
+        hasher.start()
+    result = run_redaction_job(video_path, output_path, bbox_coords, threads)
+    if hasher is not None:
+        hasher.join()
+    result.update(video_sha256=video_sha256 or hashed.get('sha256'),
+                  video_size=stat.st_size, video_mtime=stat.st_mtime)
+    return result
+
+def file_sha256(path, chunk_size=8 * 1024 * 1024):
+    """SHA-256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _text_sha256(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def load_ledger(output_dir):
+    """Load the job ledger of an output directory ({video name: entry})."""
+    path = os.path.join(output_dir, LEDGER_FILENAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_ledger(output_dir, ledger):
+    """Write the job ledger atomically."""
+    path = os.path.join(output_dir, LEDGER_FILENAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(ledger, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def _video_hash(video_path, entry):
+    """
+    Hash needed to check a video against its ledger entry before encoding.
+
+    Reuses the ledger's hash while the file's size and mtime are unchanged and
+    only reads the file when an entry exists but the file was touched. Returns
+    None without an entry: the video is encoded anyway and hashed during it.
+    """
+    if not entry:
+        return None
+    stat = os.stat(video_path)
+    if entry.get('video_size') == stat.st_size and entry.get('video_mtime') == stat.st_mtime:
+        return entry['video_sha256']
+    return file_sha256(video_path)
+
+def job_key(video_sha256, bbox_coords):
+    """Ledger key fields: input content, redaction filter and encoder settings."""
+    return {
+        'video_sha256': video_sha256,
+        'coords_sha256': _text_sha256(redaction_filter(bbox_coords)),
+        'settings_sha256': _text_sha256(json.dumps(ENCODER_SETTINGS)),
+    }
+
+def _is_complete(entry, key, output_path):
+    if not entry or any(entry.get(field) != value for field, value in key.items()):
+        return False
+    # A missing or differently sized output means it was replaced or damaged
+    return os.path.exists(output_path) and os.path.getsize(output_path) == entry.get('output_bytes')
+
+def redact_videos(matched_videos, output_dir, jobs=1, threads=None, force=False):
+    """
+    Redact every matched video with up to `jobs` concurrent ffmpeg processes.
+
+    Videos whose ledger entry matches their current job key are skipped
+    unless force is set. Returns (results, encode_seconds) with one result
+    dict per video; encode_seconds is the wall time of the encode phase only.
+    """
+    if threads is None:
+        threads = threads_per_job(jobs) if jobs > 1 else None
+    ledger = {} if force else load_ledger(output_dir)
+
+    results = []
+    hashes = {}
+    with ThreadPool(processes=max(1, jobs)) as pool:
+        video_paths = list(matched_videos)
+        known = pool.map(lambda path: _video_hash(path, ledger.get(os.path.basename(path))), video_paths)
+
+        pending = []
+        for video_path, video_sha256 in zip(video_paths, known):
+            name = os.path.basename(video_path)
+            output_path = os.path.join(output_dir, name)
+            hashes[video_path] = video_sha256
+            if video_sha256 and _is_complete(ledger.get(name), job_key(video_sha256, matched_videos[video_path]),
+                                             output_path):
+                results.append({'video': name, 'output': output_path, 'success': True, 'skipped': True,
+                                'frames': 0, 'input_bytes': 0, 'output_bytes': ledger[name]['output_bytes'],
+                                'seconds': 0.0, 'error': None})
+                # A touched but unchanged file was just re-hashed; remember its new size and mtime
+                stat = os.stat(video_path)
+                ledger[name].update(video_size=stat.st_size, video_mtime=stat.st_mtime)
+            else:
+                pending.append(video_path)
+        if results:
+            print(f"  Skipping {len(results)} video(s) already redacted with the same inputs and settings")
+            save_ledger(output_dir, ledger)
+
+        # Largest files first, so the slowest encodes never start at the end
+        pending.sort(key=os.path.getsize, reverse=True)
+        tasks = [(video_path, os.path.join(output_dir, os.path.basename(video_path)),
+                  matched_videos[video_path], threads, hashes[video_path]) for video_path in pending]
+        coords_by_name = {os.path.basename(path): matched_videos[path] for path in pending}
+
+        start = time.perf_counter()
+        for done, result in enumerate(pool.imap_unordered(_redaction_task, tasks), start=1):
+            results.append(result)
+            name = result['video']
+            if result['success']:
+                if result['video_sha256']:
+                    ledger[name] = dict(job_key(result['video_sha256'], coords_by_name[name]),
+                                        video_size=result['video_size'], video_mtime=result['video_mtime'],
+                                        output_bytes=result['output_bytes'],
+                                        completed=time.strftime('%Y-%m-%dT%H:%M:%S'))
+                else:
+                    # Could not hash the input; the next run encodes this video again
+                    ledger.pop(name, None)
+                print(f"  ✓ {name}: {result['frames']} frames in {result['seconds']:.1f}s "
+                      f"[{done}/{len(tasks)}]")
+            else:
+                ledger.pop(name, None)
+                print(f"  ✗ {name}: {result['error']} [{done}/{len(tasks)}]")
+            # Saved after every job so an interrupted run loses at most the encodes in flight
+            save_ledger(output_dir, ledger)
+        elapsed = time.perf_counter() - start
+    return results, elapsed
+
 def main():
+    parser = argparse.ArgumentParser(description="Apply saved PHI redaction boxes to videos")
+    parser.add_argument('--video-dir', default="rau_so_seg_videos_noaudio", help="Directory of input videos")
+    parser.add_argument('--coords-dir', default=None, help="Coordinate files (default: <video-dir>/phi_coords)")
+    parser.add_argument('--output-dir', default="rau_so_seg_videos_redacted", help="Directory for redacted videos")
+    parser.add_argument('--jobs', type=int, default=1, help="Concurrent ffmpeg encodes (default: 1)")
+    parser.add_argument('--threads', type=int, default=None,
+                        help="ffmpeg threads per encode (default: CPU cores divided by --jobs)")
+    parser.add_argument('--force', action='store_true', help="Ignore the job ledger and re-encode every video")
+    parser.add_argument('--catalog', default=DEFAULT_CATALOG_PATH, help="Video catalog file (see video_catalog.py)")
+    args = parser.parse_args()
+    
     # Configuration
-    video_dir = "rau_so_seg_videos_noaudio"
-    coords_dir = os.path.join(video_dir, "phi_coords")
-    output_dir = "rau_so_seg_videos_redacted"
+    video_dir = args.video_dir
+    coords_dir = args.coords_dir or os.path.join(video_dir, "phi_coords")
+    output_dir = args.output_dir
     
     # Create output directory
     os.makedirs(output_dir, exist_ok=True)
@@ -130,9 +434,10 @@ def main():
     print(f"\nMatching coordinates to videos...")
     matched_videos = {}
     unmatched_coords = []
+    catalog = VideoCatalog(args.catalog)
     
     for number, coords in coordinates.items():
-        video_path = find_matching_video(number, video_dir)
+        video_path = find_matching_video(number, video_dir, catalog)
         if video_path:
             matched_videos[video_path] = coords
             print(f"✓ {number} -> {os.path.basename(video_path)}")
@@ -149,21 +454,28 @@ def main():
         return
     
     # Apply redaction to matched videos
-    print(f"\nApplying redaction to {len(matched_videos)} videos...")
+    print(f"\nApplying redaction to {len(matched_videos)} videos with {args.jobs} concurrent job(s)...")
     print("-" * 50)
     
-    success_count = 0
+    results, elapsed = redact_videos(matched_videos, output_dir, args.jobs, args.threads, args.force)
+    success_count = sum(1 for r in results if r['success'])
+    skipped_count = sum(1 for r in results if r['skipped'])
     total_count = len(matched_videos)
-    
-    for video_path, coords in matched_videos.items():
-        video_name = os.path.basename(video_path)
-        output_path = os.path.join(output_dir, video_name)
-        
-        if apply_redaction_to_video(video_path, output_path, coords):
-            success_count += 1
+    total_frames = sum(r['frames'] for r in results)
+    total_mb = sum(r['input_bytes'] for r in results if r['success']) / (1024 * 1024)
     
     print("-" * 50)
-    print(f"Redaction complete: {success_count}/{total_count} videos processed successfully")
+    print(f"Redaction complete: {success_count}/{total_count} videos processed successfully "
+          f"({skipped_count} unchanged since the last run)")
+    if elapsed > 0:
+        print(f"Throughput: {total_frames / elapsed:.1f} frames/s, {total_mb / elapsed:.1f} MB/s "
+              f"({elapsed:.1f}s encoding wall time)")
+    
+    failures = [r for r in results if not r['success']]
+    if failures:
+        print(f"\nFailed videos ({len(failures)}):")
+        for r in failures:
+            print(f"  {r['video']}: {r['error']}")
     
     if success_count > 0:
         print(f"Redacted videos saved to: {output_dir}/")
@@ -172,7 +484,9 @@ def main():
         print(f"\nSample of processed videos:")
         for i, (video_path, coords) in enumerate(list(matched_videos.items())[:5]):
             video_name = os.path.basename(video_path)
-            print(f"  {video_name}: redacted area {coords['width']}x{coords['height']} at ({coords['x']}, {coords['y']})")
+            regions = len(coords.get('regions', [coords]))
+            print(f"  {video_name}: redacted area {coords['width']}x{coords['height']} at ({coords['x']}, {coords['y']})"
+                  + (f" in {regions} regions" if regions > 1 else ""))
         
         if len(matched_videos) > 5:
             print(f"  ... and {len(matched_videos) - 5} more videos")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Build a multi-resolution cache of SCOPE_HN frames and masks.
+
+For every requested size (longest side in pixels) the cache mirrors the
+dataset layout:
+
+    <cache>/<size>/{patient}/images/<same filename>
+    <cache>/<size>/{patient}/masks/<same filename>
+
+Images are resampled with area averaging (or bicubic), masks with nearest
+neighbour so class indices stay valid. JPEG frames are decoded at reduced
+scale with PIL's draft mode before resizing. Each size directory keeps a
+manifest of the source size and modtime of every entry, so re-annotated
+masks only invalidate their own cached files.
+
+Usage:
+    python build_pyramid_cache.py /path/to/SCOPE_HN /path/to/cache --sizes 512,256
+"""
+
+import argparse
+import json
+import os
+from multiprocessing import Pool
+
+from PIL import Image
+
+from find_image_mask_discrepancy import build_dataset_index
+
+MANIFEST_FILENAME = "manifest.json"
+RESAMPLING = {'area': Image.BOX, 'bicubic': Image.BICUBIC}
+
+def pyramid_root(cache_dir, size):
+    """Dataset root of one resolution level; same layout as the source."""
+    return os.path.join(cache_dir, str(size))
+
+def _scaled_size(width, height, size):
+    scale = min(1.0, size / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+def _load_manifest(cache_dir, size):
+    path = os.path.join(pyramid_root(cache_dir, size), MANIFEST_FILENAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def _save_manifest(cache_dir, size, manifest):
+    path = os.path.join(pyramid_root(cache_dir, size), MANIFEST_FILENAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+def _build_task(task):
+    """Write every missing resolution level of one source file."""
+    rel_path, source_path, cache_dir, sizes, resampling = task
+    is_mask = rel_path.split('/')[1] == 'masks'
+    try:
+        with Image.open(source_path) as img:
+            # Level sizes come from the original size, so images and masks always match
+            source_width, source_height = img.size
+            if not is_mask:
+                # Decode JPEGs at the smallest scale that still covers the largest level
+                width, height = _scaled_size(source_width, source_height, max(sizes))
+                img.draft('RGB', (width, height))
+            img.load()
+            source_format = img.format
+            for size in sorted(sizes, reverse=True):
+                target = _scaled_size(source_width, source_height, size)
+                if is_mask:
+                    resized = img.resize(target, Image.NEAREST) if target != img.size else img
+                else:
+                    resized = img.resize(target, RESAMPLING[resampling]) if target != img.size else img
+                out_path = os.path.join(pyramid_root(cache_dir, size), rel_path)
+                os.makedirs(os.path.dirname(out_path), exist_ok=True)
+                if source_format == 'JPEG':
+                    resized.save(out_path, format='JPEG', quality=95)
+                else:
+                    resized.save(out_path, format=source_format)
+                # Later, smaller levels resample from this one
+                img = resized
+        return rel_path, True
+    except Exception as e:
+        print(f"Warning: could not cache {source_path}: {e}")
+        return rel_path, False
+
+def build_pyramid_cache(root, cache_dir, sizes, index=None, workers=None, resampling='area'):
+    """
+    Create or refresh the cache for the given sizes.
+
+    Returns the number of source files that were (re)generated.
+    """
+    if index is None:
+        index = build_dataset_index(root)
+
+    manifests = {size: _load_manifest(cache_dir, size) for size in sizes}
+    sources = {}
+    tasks = []
+    for patient_id in sorted(index):
+        for folder in ('images', 'masks'):
+            for filename, meta in index[patient_id][folder].items():
+                rel_path = f"{patient_id}/{folder}/{filename}"
+                key = {'size': meta['size'], 'modtime': str(meta['modtime'])}
+                sources[rel_path] = key
+                stale = [size for size in sizes if manifests[size].get(rel_path) != key]
+                if stale:
+                    tasks.append((rel_path, os.path.join(root, patient_id, folder, filename),
+                                  cache_dir, stale, resampling))
+
+    built = 0
+    if tasks:
+        with Pool(processes=workers or os.cpu_count()) as pool:
+            for rel_path, ok in pool.imap_unordered(_build_task, tasks, chunksize=4):
+                if ok:
+                    built += 1
+                    for size in sizes:
+                        manifests[size][rel_path] = sources[rel_path]
+
+    for size in sizes:
+        os.makedirs(pyramid_root(cache_dir, size), exist_ok=True)
+        # Drop entries (and files) whose source no longer exists
+        for rel_path in set(manifests[size]) - set(sources):
+            stale_path = os.path.join(pyramid_root(cache_dir, size), rel_path)
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+            del manifests[size][rel_path]
+        _save_manifest(cache_dir, size, manifests[size])
+
+    return built
+
+def main():
+    parser = argparse.ArgumentParser(description="Build downsampled copies of frames and masks")
+    parser.add_argument('root', help="Local copy of the SCOPE_HN dataset")
+    parser.add_argument('cache_dir', help="Output directory for the resolution levels")
+    parser.add_argument('--sizes', default='512,256', help="Comma-separated longest-side sizes in pixels")
+    parser.add_argument('--resampling', choices=sorted(RESAMPLING), default='area',
+                        help="Image resampling filter (masks always use nearest neighbour)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',')]
+    built = build_pyramid_cache(args.root, args.cache_dir, sizes, workers=args.workers,
+                                resampling=args.resampling)
+    print(f"Cache at {args.cache_dir} is up to date for sizes {sizes} ({built} source files regenerated)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Precompute per-image class pixel counts for the SCOPE_HN masks.
+
+Writes a single compressed .npz file holding an (N x 12) int64 count matrix
+(one column per semantic class, unlabeled pixels excluded) plus the image id,
+patient id, total pixel count, mask size and mask modtime of every row.
+Re-running the build only decodes masks whose size or modtime changed since
+the previous store.
+
+Usage:
+    python class_histograms.py /path/to/SCOPE_HN [--full] [--workers N]
+"""
+
+import argparse
+import os
+from multiprocessing import Pool
+
+import numpy as np
+from PIL import Image
+
+from find_image_mask_discrepancy import build_dataset_index
+from mask_validation import NUM_CLASSES
+
+DEFAULT_STORE_PATH = "class_histograms.npz"
+
+CLASS_NAMES = [
+    "Tumor", "Normal Mucosa", "Tongue Base", "Soft Palate",
+    "Pharyngeal Wall", "Epiglottis", "Vocal Cords", "Arytenoids",
+    "Scope Artifact", "Reflection", "Motion Blur", "Background",
+]
+
+def class_counts(values):
+    """Return pixel counts for classes 1-12 of a decoded mask array."""
+    counts = np.bincount(values.ravel(), minlength=NUM_CLASSES + 1)
+    return counts[1:NUM_CLASSES + 1].astype(np.int64)
+
+def mask_class_counts(mask_path):
+    """Return (pixel counts for classes 1-12, total pixels) of a single mask."""
+    with Image.open(mask_path) as mask:
+        values = np.asarray(mask)
+    return class_counts(values), values.size
+
+def _count_task(task):
+    image_id, mask_path = task
+    try:
+        return image_id, mask_class_counts(mask_path)
+    except Exception as e:
+        print(f"Warning: could not read {mask_path}: {e}")
+        return image_id, None
+
+def load_class_histograms(store_path=DEFAULT_STORE_PATH):
+    """Load a histogram store as a dict of arrays, or None if it does not exist."""
+    if not os.path.exists(store_path):
+        return None
+    with np.load(store_path) as data:
+        return {key: data[key] for key in data.files}
+
+def save_class_histograms(store, store_path=DEFAULT_STORE_PATH):
+    """Write a histogram store to a compressed .npz file."""
+    np.savez_compressed(store_path, **store)
+
+def build_class_histograms(root, store_path=DEFAULT_STORE_PATH, index=None, workers=None, full=False):
+    """
+    Build or incrementally update the histogram store for a local dataset copy.
+
+    Returns (store, recomputed) where recomputed is the number of masks that
+    had to be decoded on this run.
+    """
+    if index is None:
+        index = build_dataset_index(root)
+
+    previous = {}
+    existing = None if full else load_class_histograms(store_path)
+    # Stores written before pixel totals were recorded are rebuilt
+    if existing is not None and 'pixels' in existing:
+        for row, image_id in enumerate(existing['image_ids']):
+            previous[image_id] = (existing['sizes'][row], existing['modtimes'][row],
+                                  (existing['counts'][row], existing['pixels'][row]))
+
+    image_ids, patient_ids, sizes, modtimes = [], [], [], []
+    rows = {}
+    tasks = []
+    for patient_id in sorted(index):
+        for filename, meta in sorted(index[patient_id]['masks'].items()):
+            image_id = os.path.splitext(filename)[0]
+            modtime = str(meta['modtime'])
+            image_ids.append(image_id)
+            patient_ids.append(patient_id)
+            sizes.append(meta['size'])
+            modtimes.append(modtime)
+            cached = previous.get(image_id)
+            if cached is not None and cached[0] == meta['size'] and cached[1] == modtime:
+                rows[image_id] = cached[2]
+            else:
+                tasks.append((image_id, os.path.join(root, patient_id, 'masks', filename)))
+
+    if tasks:
+        with Pool(processes=workers or os.cpu_count()) as pool:
+            for image_id, result in pool.imap_unordered(_count_task, tasks, chunksize=4):
+                rows[image_id] = result
+
+    # Unreadable masks are left out so they are retried on the next build
+    keep = [row for row, image_id in enumerate(image_ids) if rows[image_id] is not None]
+    image_ids = [image_ids[row] for row in keep]
+    patient_ids = [patient_ids[row] for row in keep]
+    sizes = [sizes[row] for row in keep]
+    modtimes = [modtimes[row] for row in keep]
+
+    counts = np.zeros((len(image_ids), NUM_CLASSES), dtype=np.int64)
+    pixels = np.zeros(len(image_ids), dtype=np.int64)
+    for row, image_id in enumerate(image_ids):
+        counts[row], pixels[row] = rows[image_id]
+
+    store = {
+        'image_ids': np.array(image_ids, dtype=str),
+        'patient_ids': np.array(patient_ids, dtype=str),
+        'sizes': np.array(sizes, dtype=np.int64),
+        'modtimes': np.array(modtimes, dtype=str),
+        'counts': counts,
+        'pixels': pixels,
+    }
+    save_class_histograms(store, store_path)
+    return store, len(tasks)
+
+def class_distribution(store, patient_id=None):
+    """Sum class pixel counts over the whole dataset or a single patient."""
+    counts = store['counts']
+    if patient_id is not None:
+        counts = counts[store['patient_ids'] == patient_id]
+    return counts.sum(axis=0)
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute per-image class pixel counts")
+    parser.add_argument('root', help="Local copy of the SCOPE_HN dataset")
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH, help="Output .npz file")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--full', action='store_true', help="Ignore the existing store and decode every mask")
+    args = parser.parse_args()
+
+    store, recomputed = build_class_histograms(args.root, args.store, workers=args.workers, full=args.full)
+    print(f"Stored class counts for {len(store['image_ids'])} masks in {args.store} "
+          f"({recomputed} decoded on this run)")
+
+if __name__ == "__main__":
+    main()
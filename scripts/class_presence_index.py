@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Inverted index from each of the 12 SCOPE_HN classes to the frames and
+patients where it appears, with the pixel fraction of every occurrence.
+
+The index is derived from the class histogram store (class_histograms.py),
+so it is built in parallel and only re-decodes masks whose size or modtime
+changed. Entries are grouped by (class, patient) and sorted by descending
+pixel fraction within each group, so a query such as "frames with tumor
+above 5% of the frame from patients 001 and 002" is one dict lookup and
+one binary search per patient, without opening any image or mask.
+
+Usage:
+    python class_presence_index.py /path/to/SCOPE_HN [--query Tumor:0.05] [--patients 001,002]
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from class_histograms import CLASS_NAMES, DEFAULT_STORE_PATH, build_class_histograms
+from mask_validation import NUM_CLASSES
+
+DEFAULT_INDEX_PATH = "class_presence_index.npz"
+
+def class_number(name_or_index):
+    """Resolve a class name (case-insensitive) or 1-based index to its class index."""
+    if isinstance(name_or_index, str) and not name_or_index.isdigit():
+        names = [name.lower() for name in CLASS_NAMES]
+        try:
+            return names.index(name_or_index.lower()) + 1
+        except ValueError:
+            raise ValueError(f"Unknown class: {name_or_index}")
+    class_index = int(name_or_index)
+    if not 1 <= class_index <= NUM_CLASSES:
+        raise ValueError(f"Class index must be between 1 and {NUM_CLASSES}: {class_index}")
+    return class_index
+
+def build_class_presence_table(store):
+    """Turn a class histogram store into the grouped, sorted inverted-index arrays."""
+    counts = store['counts']
+    pixels = np.maximum(store['pixels'], 1)
+    fractions = counts / pixels[:, None]
+
+    rows, columns = np.nonzero(counts)
+    patient_ids = store['patient_ids'][rows]
+    entry_fractions = fractions[rows, columns]
+    # Group by class, then patient; highest fraction first within a group
+    order = np.lexsort((-entry_fractions, patient_ids, columns))
+    rows, columns = rows[order], columns[order]
+    patient_ids, entry_fractions = patient_ids[order], entry_fractions[order]
+
+    starts = np.flatnonzero(np.concatenate(([True], (columns[1:] != columns[:-1])
+                                            | (patient_ids[1:] != patient_ids[:-1]))))
+    return {
+        'image_ids': store['image_ids'],
+        'entry_rows': rows.astype(np.int32),
+        'entry_fractions': entry_fractions.astype(np.float32),
+        'group_classes': (columns[starts] + 1).astype(np.int8),
+        'group_patients': patient_ids[starts],
+        'group_offsets': np.append(starts, len(rows)).astype(np.int64),
+    }
+
+class ClassPresenceIndex:
+    """Query frames and patients by class presence and pixel fraction."""
+
+    def __init__(self, table):
+        self.image_ids = table['image_ids']
+        self._rows = table['entry_rows']
+        self._fractions = table['entry_fractions']
+        self._groups = {}
+        self._patients = {c: [] for c in range(1, NUM_CLASSES + 1)}
+        offsets = table['group_offsets']
+        for g, (class_index, patient_id) in enumerate(zip(table['group_classes'], table['group_patients'])):
+            self._groups[(int(class_index), str(patient_id))] = (int(offsets[g]), int(offsets[g + 1]))
+            self._patients[int(class_index)].append(str(patient_id))
+
+    def _slice(self, class_index, patient_id, min_fraction):
+        bounds = self._groups.get((class_index, patient_id))
+        if bounds is None:
+            return slice(0, 0)
+        start, end = bounds
+        # Fractions are sorted descending, so the matches are a prefix of the group
+        matched = np.searchsorted(-self._fractions[start:end], -min_fraction, side='left')
+        return slice(start, start + int(matched))
+
+    def frames(self, class_name, min_fraction=0.0, patients=None):
+        """
+        Return (image_ids, fractions) of frames where the class covers more
+        than min_fraction of the frame, optionally restricted to some patients.
+        """
+        class_index = class_number(class_name)
+        if patients is None:
+            patients = self._patients[class_index]
+        slices = [self._slice(class_index, str(p), min_fraction) for p in patients]
+        rows = np.concatenate([self._rows[s] for s in slices] or [np.zeros(0, dtype=np.int32)])
+        fractions = np.concatenate([self._fractions[s] for s in slices] or [np.zeros(0, dtype=np.float32)])
+        return self.image_ids[rows], fractions
+
+    def patients(self, class_name, min_fraction=0.0):
+        """Patients with at least one frame where the class covers more than min_fraction."""
+        class_index = class_number(class_name)
+        return [p for p in self._patients[class_index]
+                if self._fractions[self._groups[(class_index, p)][0]] > min_fraction]
+
+def save_class_presence_index(table, index_path=DEFAULT_INDEX_PATH):
+    """Write the inverted-index arrays to a compressed .npz file."""
+    np.savez_compressed(index_path, **table)
+
+def load_class_presence_index(index_path=DEFAULT_INDEX_PATH):
+    """Load a ClassPresenceIndex, or None if the file does not exist."""
+    if not os.path.exists(index_path):
+        return None
+    with np.load(index_path) as data:
+        return ClassPresenceIndex({key: data[key] for key in data.files})
+
+def build_class_presence_index(root, index_path=DEFAULT_INDEX_PATH, store_path=DEFAULT_STORE_PATH,
+                               workers=None, full=False):
+    """
+    Update the class histogram store and rewrite the inverted index from it.
+
+    Returns (index, recomputed) where recomputed is the number of masks that
+    had to be decoded on this run.
+    """
+    store, recomputed = build_class_histograms(root, store_path, workers=workers, full=full)
+    table = build_class_presence_table(store)
+    save_class_presence_index(table, index_path)
+    return ClassPresenceIndex(table), recomputed
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a class-to-frames inverted index")
+    parser.add_argument('root', help="Local copy of the SCOPE_HN dataset")
+    parser.add_argument('--output', default=DEFAULT_INDEX_PATH, help="Output .npz file")
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH, help="Class histogram store to update")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--full', action='store_true', help="Decode every mask again")
+    parser.add_argument('--query', default=None, help="CLASS:MIN_FRACTION, e.g. Tumor:0.05")
+    parser.add_argument('--patients', default=None, help="Comma-separated patient ids for --query")
+    args = parser.parse_args()
+
+    index, recomputed = build_class_presence_index(args.root, args.output, args.store,
+                                                   workers=args.workers, full=args.full)
+    print(f"Indexed class presence for {len(index.image_ids)} masks in {args.output} "
+          f"({recomputed} decoded on this run)")
+    for class_index, name in enumerate(CLASS_NAMES, start=1):
+        frames, _ = index.frames(class_index)
+        print(f"  {name:<16} {len(frames):>7} frames, {len(index.patients(class_index)):>4} patients")
+
+    if args.query:
+        class_name, _, min_fraction = args.query.partition(':')
+        patients = args.patients.split(',') if args.patients else None
+        frames, fractions = index.frames(class_name, float(min_fraction or 0), patients)
+        print(f"\n{len(frames)} frames with {class_name} above {float(min_fraction or 0):.1%}:")
+        for image_id, fraction in zip(frames, fractions):
+            print(f"  {image_id}: {fraction:.1%}")
+
+if __name__ == "__main__":
+    main()
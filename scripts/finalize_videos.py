@@ -11,9 +11,10 @@ This script:
 import os
 import shutil
 import subprocess
-import glob
 from pathlib import Path
 
+from video_catalog import VideoCatalog
+
 def main():
     # Directories
     trimmed_dir = "Project/trimmed_videos"
@@ -26,8 +27,10 @@ def main():
     # Create final directory
     os.makedirs(final_dir, exist_ok=True)
     
-    # Get all trimmed videos
-    trimmed_videos = sorted(glob.glob(os.path.join(trimmed_dir, "trimmed_*.mp4")))
+    # Get all trimmed videos from the shared catalog (cached ffprobe metadata)
+    catalog = VideoCatalog()
+    trimmed_videos = [path for path in catalog.videos(trimmed_dir)
+                      if os.path.basename(path).startswith("trimmed_")]
     
     if not trimmed_videos:
         print("No trimmed videos found!")
@@ -36,15 +39,26 @@ def main():
     print(f"Found {len(trimmed_videos)} trimmed videos to process")
     print()
     
+    video_infos = catalog.refresh(trimmed_videos)
+    
     # Process each video
     renamed_count = 0
     total_size = 0
+    total_duration = 0.0
     
     for trimmed_path in trimmed_videos:
         # Extract original filename
         filename = os.path.basename(trimmed_path)
         original_name = filename.replace("trimmed_", "")
         
+        # Skip files ffprobe cannot read rather than uploading a broken video
+        video_info = video_infos[trimmed_path]
+        if video_info is None:
+            print(f"❌ Skipping {filename}: not a readable video")
+            continue
+        if video_info['has_audio']:
+            print(f"⚠️  {filename} still has an audio track")
+        
         # Create final path
         final_path = os.path.join(final_dir, original_name)
         
@@ -53,9 +67,11 @@ def main():
             shutil.copy2(trimmed_path, final_path)
             file_size = os.path.getsize(final_path)
             total_size += file_size
+            total_duration += video_info['duration']
             renamed_count += 1
             
-            print(f"✅ {filename} → {original_name} ({file_size / (1024*1024):.1f} MB)")
+            print(f"✅ {filename} → {original_name} ({file_size / (1024*1024):.1f} MB, "
+                  f"{video_info['duration']:.1f}s)")
             
         except Exception as e:
             print(f"❌ Error processing {filename}: {e}")
@@ -63,6 +79,7 @@ def main():
     print()
     print(f"✅ Successfully processed {renamed_count} videos")
     print(f"📊 Total size: {total_size / (1024*1024*1024):.2f} GB")
+    print(f"⏱️  Total duration: {total_duration / 60:.1f} minutes")
     print(f"📁 Final videos saved to: {final_dir}")
     print()
     
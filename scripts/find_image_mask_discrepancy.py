@@ -5,46 +5,153 @@ This script identifies:
 1. Images without corresponding masks
 2. Masks without corresponding images
 3. Summary statistics
+
+With --manifest the whole images/masks tree is read from a single recursive
+listing (one `rclone lsjson -R` call, or os.scandir for a local copy) instead
+of one `rclone lsf` call per patient per folder. With --incremental the
+pairing results are cached in a local SQLite index (see validation_cache.py)
+and only patients whose listing changed are re-checked. With --deep every
+pair in a local copy is decoded and checked pixel by pixel (see
+mask_validation.py).
+
+--format json|csv replaces the text report with the full per-patient results
+plus wall-clock timings per stage (listing, pairing, reporting) and per rclone
+call, for pipelines and CI gates.
 """
 
+import argparse
+import csv
 import subprocess
 import json
 import os
+import sys
+import time
+from contextlib import contextmanager
 from pathlib import Path
 import re
 
+REMOTE_ROOT = "gdrive:/Rau_So_Segmentation_Dataset/SCOPE_HN"
+
+# Wall-clock time of every rclone call made by this process
+RCLONE_TIMINGS = []
+
 def run_rclone_command(command):
     """Run rclone command and return output."""
+    start = time.perf_counter()
     try:
         result = subprocess.run(command, shell=True, capture_output=True, text=True, check=True)
         return result.stdout.strip().split('\n') if result.stdout.strip() else []
     except subprocess.CalledProcessError as e:
-        print(f"Error running command: {command}")
-        print(f"Error: {e.stderr}")
+        print(f"Error running command: {command}", file=sys.stderr)
+        print(f"Error: {e.stderr}", file=sys.stderr)
         return []
+    finally:
+        RCLONE_TIMINGS.append({'command': command, 'seconds': time.perf_counter() - start})
+
+def _add_to_index(index, rel_path, size, modtime):
+    """Add one `{patient}/{images|masks}/{file}` entry to a dataset index."""
+    parts = rel_path.split('/')
+    if len(parts) != 3 or parts[1] not in ('images', 'masks'):
+        return
+    patient_id, folder, filename = parts
+    patient = index.setdefault(patient_id, {'images': {}, 'masks': {}})
+    patient[folder][filename] = {'size': size, 'modtime': modtime}
+
+def _iter_remote_listing(root):
+    """
+    Stream entries from a single recursive `rclone lsjson` call.
+
+    Directories are yielded with a trailing '/', as `rclone lsf` prints them.
+    """
+    command = ['rclone', 'lsjson', '-R', '--no-mimetype', f"{root}/"]
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    # rclone writes one JSON object per line between the enclosing brackets,
+    # so entries can be consumed as they arrive instead of buffering the array
+    for line in process.stdout:
+        line = line.strip().rstrip(',')
+        if not line or line in ('[', ']'):
+            continue
+        entry = json.loads(line)
+        path = entry['Path'] + '/' if entry.get('IsDir') else entry['Path']
+        yield path, entry.get('Size', 0), entry.get('ModTime', '')
+    stderr = process.stderr.read()
+    returncode = process.wait()
+    RCLONE_TIMINGS.append({'command': ' '.join(command), 'seconds': time.perf_counter() - start})
+    if returncode != 0:
+        raise RuntimeError(f"rclone lsjson failed for {root}: {stderr.strip()}")
+
+def _iter_local_listing(root):
+    """Walk a local copy of the dataset with os.scandir."""
+    with os.scandir(root) as patients:
+        for patient in patients:
+            if not patient.is_dir():
+                continue
+            for folder in ('images', 'masks'):
+                folder_path = os.path.join(patient.path, folder)
+                if not os.path.isdir(folder_path):
+                    continue
+                with os.scandir(folder_path) as files:
+                    for f in files:
+                        if f.is_file():
+                            stat = f.stat()
+                            yield f"{patient.name}/{folder}/{f.name}", stat.st_size, stat.st_mtime
+
+def build_dataset_index(root=REMOTE_ROOT):
+    """
+    Build an in-memory patient -> {'images', 'masks'} index from one listing.
 
-def get_patient_directories():
+    Each folder maps filename -> {'size', 'modtime'}. `root` may be an rclone
+    remote path or a local directory holding a copy of the dataset.
+    """
+    root = root.rstrip('/')
+    if os.path.isdir(root):
+        entries = _iter_local_listing(root)
+        # Patients with empty folders still count as patient directories
+        index = {d.name: {'images': {}, 'masks': {}} for d in os.scandir(root) if d.is_dir()}
+    else:
+        entries = _iter_remote_listing(root)
+        index = {}
+    for rel_path, size, modtime in entries:
+        if rel_path.endswith('/'):
+            # Top-level folders are patients even when they hold no files
+            if rel_path.count('/') == 1:
+                index.setdefault(rel_path[:-1], {'images': {}, 'masks': {}})
+            continue
+        _add_to_index(index, rel_path, size, modtime)
+    return index
+
+def get_patient_directories(index=None):
     """Get all patient directories."""
-    command = "rclone lsf gdrive:/Rau_So_Segmentation_Dataset/SCOPE_HN/ --dirs-only"
+    if index is not None:
+        return list(index)
+    command = f"rclone lsf {REMOTE_ROOT}/ --dirs-only"
     return [d.rstrip('/') for d in run_rclone_command(command) if d.strip()]
 
-def get_patient_images(patient_id):
+def get_patient_images(patient_id, index=None):
     """Get all image files for a specific patient."""
-    command = f"rclone lsf gdrive:/Rau_So_Segmentation_Dataset/SCOPE_HN/{patient_id}/images/"
+    if index is not None:
+        return list(index.get(patient_id, {}).get('images', {}))
+    command = f"rclone lsf {REMOTE_ROOT}/{patient_id}/images/"
     files = run_rclone_command(command)
     return [f for f in files if f.strip()]
 
-def get_patient_masks(patient_id):
+def get_patient_masks(patient_id, index=None):
     """Get all mask files for a specific patient."""
-    command = f"rclone lsf gdrive:/Rau_So_Segmentation_Dataset/SCOPE_HN/{patient_id}/masks/"
+    if index is not None:
+        return list(index.get(patient_id, {}).get('masks', {}))
+    command = f"rclone lsf {REMOTE_ROOT}/{patient_id}/masks/"
     files = run_rclone_command(command)
     return [f for f in files if f.strip()]
 
-def find_discrepancies_by_patient(patient_id):
+def find_discrepancies_by_patient(patient_id, index=None):
     """Find discrepancies for a specific patient."""
-    images = get_patient_images(patient_id)
-    masks = get_patient_masks(patient_id)
-    
+    images = get_patient_images(patient_id, index)
+    masks = get_patient_masks(patient_id, index)
+    return find_discrepancies(images, masks)
+
+def find_discrepancies(images, masks):
+    """Pair one patient's image and mask filenames by stem."""
     # Create base name sets (without extensions)
     image_bases = {Path(f).stem for f in images}
     mask_bases = {Path(f).stem for f in masks}
@@ -67,10 +174,21 @@ def find_discrepancies_by_patient(patient_id):
         'total_matches': len(matching_pairs)
     }
 
-def analyze_by_patient(images, masks):
+def analyze_by_patient(images=None, masks=None, index=None):
     """Analyze discrepancies by patient."""
     patient_stats = {}
     
+    if index is not None:
+        for patient_id in sorted(index):
+            n_images = len(index[patient_id]['images'])
+            n_masks = len(index[patient_id]['masks'])
+            patient_stats[patient_id] = {
+                'images': n_images,
+                'masks': n_masks,
+                'difference': n_images - n_masks
+            }
+        return patient_stats
+    
     # Get all patient IDs
     all_patients = set()
     for key in images.keys():
@@ -92,12 +210,143 @@ def analyze_by_patient(images, masks):
     
     return patient_stats
 
+class StageTimer:
+    """Accumulate wall-clock seconds per named stage."""
+
+    def __init__(self):
+        self.stages = {}
+        self.start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def total(self):
+        return time.perf_counter() - self.start
+
+def patient_status(analysis):
+    """Classify a per-patient result as perfect, discrepancy, invalid or error."""
+    if 'error' in analysis:
+        return 'error'
+    if (analysis['images_without_masks'] or analysis['masks_without_images']
+            or analysis['total_images'] != analysis['total_masks']):
+        return 'discrepancy'
+    if analysis.get('invalid_pairs'):
+        return 'invalid'
+    return 'perfect'
+
+def serialize_analysis(analysis):
+    """Convert a per-patient result to JSON-safe types (sets become sorted lists)."""
+    return {key: sorted(value) if isinstance(value, set) else value
+            for key, value in analysis.items()}
+
+def build_report(analyses, timer):
+    """Assemble the machine-readable report for a set of per-patient results."""
+    patients = {patient_id: dict(serialize_analysis(analysis), status=patient_status(analysis))
+                for patient_id, analysis in sorted(analyses.items())}
+    valid = [a for a in analyses.values() if 'error' not in a]
+    summary = {
+        'total_patients': len(analyses),
+        'total_images': sum(a['total_images'] for a in valid),
+        'total_masks': sum(a['total_masks'] for a in valid),
+        'total_matches': sum(a['total_matches'] for a in valid),
+        'images_without_masks': sum(len(a['images_without_masks']) for a in valid),
+        'masks_without_images': sum(len(a['masks_without_images']) for a in valid),
+        'invalid_pairs': sum(len(a.get('invalid_pairs', {})) for a in valid),
+        'patients_with_discrepancies': [p for p, a in patients.items() if a['status'] != 'perfect'],
+    }
+    timings = {
+        'total_seconds': timer.total(),
+        'stages': dict(timer.stages),
+        'rclone_calls': len(RCLONE_TIMINGS),
+        'rclone_seconds': sum(t['seconds'] for t in RCLONE_TIMINGS),
+        'rclone_commands': list(RCLONE_TIMINGS),
+    }
+    return {'patients': patients, 'summary': summary, 'timings': timings}
+
+def write_report(report, output_format, stream=sys.stdout):
+    """Write a report from build_report as JSON or CSV."""
+    if output_format == 'json':
+        json.dump(report, stream, indent=2)
+        stream.write('\n')
+        return
+
+    # CSV: one row per patient, then one row per stage and per rclone call
+    writer = csv.writer(stream)
+    writer.writerow(['record', 'id', 'status', 'total_images', 'total_masks', 'total_matches',
+                     'images_without_masks', 'masks_without_images', 'invalid_pairs', 'seconds', 'detail'])
+    for patient_id, analysis in report['patients'].items():
+        if analysis['status'] == 'error':
+            writer.writerow(['patient', patient_id, 'error', '', '', '', '', '', '', '', analysis['error']])
+            continue
+        writer.writerow(['patient', patient_id, analysis['status'],
+                         analysis['total_images'], analysis['total_masks'], analysis['total_matches'],
+                         ';'.join(analysis['images_without_masks']),
+                         ';'.join(analysis['masks_without_images']),
+                         ';'.join(sorted(analysis.get('invalid_pairs', {}))), '', ''])
+    for stage, seconds in report['timings']['stages'].items():
+        writer.writerow(['stage', stage, '', '', '', '', '', '', '', f"{seconds:.6f}", ''])
+    writer.writerow(['stage', 'total', '', '', '', '', '', '', '', f"{report['timings']['total_seconds']:.6f}", ''])
+    for i, call in enumerate(report['timings']['rclone_commands']):
+        writer.writerow(['rclone', i + 1, '', '', '', '', '', '', '', f"{call['seconds']:.6f}", call['command']])
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Find image/mask discrepancies in the SCOPE_HN dataset")
+    parser.add_argument('--manifest', action='store_true',
+                        help="Build the file index from one recursive listing instead of per-patient calls")
+    parser.add_argument('--root', default=REMOTE_ROOT,
+                        help="Dataset root for --manifest: rclone remote path or local directory")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Re-check only patients whose listing changed since the last run (implies --manifest)")
+    parser.add_argument('--cache-path', default=None,
+                        help="SQLite cache file for --incremental")
+    parser.add_argument('--full', action='store_true',
+                        help="With --incremental, ignore the cache and rebuild it from scratch")
+    parser.add_argument('--deep', action='store_true',
+                        help="Decode every pair and check dimensions, class values and empty masks (local --root only)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes for --deep (default: CPU count)")
+    parser.add_argument('--format', choices=['text', 'json', 'csv'], default='text',
+                        help="Report format: human-readable text, or JSON/CSV with per-stage timings")
+    parser.add_argument('--output', default=None,
+                        help="Write the JSON/CSV report to this file instead of stdout")
+    args = parser.parse_args()
+    if args.deep and not os.path.isdir(args.root):
+        parser.error("--deep needs --root pointing at a local copy of the dataset")
+    return args
+
 def main():
-    print("=== SCOPE-HN Dataset: Image-Mask Discrepancy Analysis ===\n")
+    args = parse_args()
+    text = args.format == 'text'
+    timer = StageTimer()
+    if text:
+        print("=== SCOPE-HN Dataset: Image-Mask Discrepancy Analysis ===\n")
     
-    # Get all patient directories
-    patients = get_patient_directories()
-    print(f"Found {len(patients)} patient directories\n")
+    with timer.stage('listing'):
+        index = None
+        if args.manifest or args.incremental or args.deep:
+            index = build_dataset_index(args.root)
+        
+        # Get all patient directories
+        patients = get_patient_directories(index)
+    if text:
+        print(f"Found {len(patients)} patient directories\n")
+    
+    precomputed_results = None
+    with timer.stage('pairing'):
+        if args.deep:
+            from mask_validation import validate_pixels
+            precomputed_results = validate_pixels(args.root, index, workers=args.workers)
+        elif args.incremental:
+            from validation_cache import DEFAULT_CACHE_PATH, cached_discrepancies
+            cache_path = args.cache_path or DEFAULT_CACHE_PATH
+            precomputed_results, rechecked = cached_discrepancies(index, cache_path, full=args.full)
+    if text and args.incremental and not args.deep:
+        print(f"Re-checked {len(rechecked)} of {len(patients)} patients (cache: {cache_path})\n")
     
     total_images = 0
     total_masks = 0
@@ -105,11 +354,26 @@ def main():
     patients_with_discrepancies = []
     all_images_without_masks = []
     all_masks_without_images = []
+    all_invalid_pairs = []
+    analyses = {}
     
-    print("=== PATIENT-WISE ANALYSIS ===")
+    if text:
+        print("=== PATIENT-WISE ANALYSIS ===")
     for patient_id in sorted(patients):
         try:
-            analysis = find_discrepancies_by_patient(patient_id)
+            if precomputed_results is not None:
+                with timer.stage('pairing'):
+                    analysis = precomputed_results[patient_id]
+            else:
+                # Per-patient listings are rclone calls without an index; time them as listing
+                with timer.stage('listing'):
+                    images = get_patient_images(patient_id, index)
+                    masks = get_patient_masks(patient_id, index)
+                with timer.stage('pairing'):
+                    analysis = find_discrepancies(images, masks)
+            analyses[patient_id] = analysis
+            if not text:
+                continue
             
             total_images += analysis['total_images']
             total_masks += analysis['total_masks']
@@ -131,11 +395,31 @@ def main():
                 patients_with_discrepancies.append(patient_id)
                 diff = analysis['total_images'] - analysis['total_masks']
                 print(f"Patient {patient_id}: {analysis['total_images']} images, {analysis['total_masks']} masks (diff: {diff:+d})")
+            elif analysis.get('invalid_pairs'):
+                patients_with_discrepancies.append(patient_id)
+                print(f"Patient {patient_id}: {analysis['total_images']} images, {analysis['total_masks']} masks - {analysis['total_invalid']} INVALID PAIR(S)")
             else:
                 print(f"Patient {patient_id}: {analysis['total_images']} images, {analysis['total_masks']} masks - PERFECT MATCH")
+            
+            for stem, problems in sorted(analysis.get('invalid_pairs', {}).items()):
+                all_invalid_pairs.append(f"Patient {patient_id}: {stem} - {'; '.join(problems)}")
                 
         except Exception as e:
-            print(f"Patient {patient_id}: ERROR - {e}")
+            analyses[patient_id] = {'error': str(e)}
+            if text:
+                print(f"Patient {patient_id}: ERROR - {e}")
+    
+    if not text:
+        with timer.stage('reporting'):
+            report = build_report(analyses, timer)
+        report['timings']['stages']['reporting'] = timer.stages['reporting']
+        report['timings']['total_seconds'] = timer.total()
+        if args.output:
+            with open(args.output, 'w', newline='') as f:
+                write_report(report, args.format, f)
+        else:
+            write_report(report, args.format)
+        return
     
     print("\n=== SUMMARY ===")
     print(f"Total images found: {total_images}")
@@ -143,6 +427,8 @@ def main():
     print(f"Total matching pairs: {total_matches}")
     print(f"Images without masks: {len(all_images_without_masks)}")
     print(f"Masks without images: {len(all_masks_without_images)}")
+    if args.deep:
+        print(f"Pairs failing pixel checks: {len(all_invalid_pairs)}")
     
     if all_images_without_masks:
         print("\n=== IMAGES WITHOUT MASKS ===")
@@ -154,6 +440,11 @@ def main():
         for item in all_masks_without_images:
             print(item)
     
+    if all_invalid_pairs:
+        print("\n=== INVALID PAIRS ===")
+        for item in all_invalid_pairs:
+            print(item)
+    
     print("\n=== STATISTICS ===")
     print(f"Total patients analyzed: {len(patients)}")
     print(f"Patients with discrepancies: {len(patients_with_discrepancies)}")
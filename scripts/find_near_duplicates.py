@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Find near-duplicate frames in a local copy of the SCOPE_HN dataset.
+
+Each image is reduced to a 64-bit difference hash (dHash) across a process
+pool. Hashes are inserted into a BK-tree so every frame only has to be
+compared against hashes within the Hamming threshold, instead of against
+every other frame. Near-duplicates are grouped into clusters and reported
+both within a patient and across patients (possible train/test leakage).
+
+Usage:
+    python find_near_duplicates.py /path/to/SCOPE_HN [--threshold 6] [--workers N]
+"""
+
+import argparse
+import os
+from multiprocessing import Pool
+
+from PIL import Image
+
+from find_image_mask_discrepancy import build_dataset_index
+
+HASH_SIZE = 8
+DEFAULT_THRESHOLD = 6
+
+def dhash(image_path, hash_size=HASH_SIZE):
+    """Compute a (hash_size * hash_size)-bit difference hash of an image."""
+    with Image.open(image_path) as img:
+        # JPEG frames can be decoded at reduced scale; the hash only needs 9x8
+        img.draft('L', (hash_size * 8, hash_size * 8))
+        small = img.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR)
+        pixels = small.tobytes()
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+def hamming_distance(a, b):
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count('1')
+
+def _hash_task(task):
+    patient_id, stem, image_path = task
+    try:
+        return patient_id, stem, dhash(image_path)
+    except Exception as e:
+        print(f"Warning: could not hash {image_path}: {e}")
+        return patient_id, stem, None
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes with Hamming distance."""
+
+    def __init__(self):
+        self.root = None
+
+    def add(self, value, item):
+        """Insert a hash; items with identical hashes share a node."""
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def query(self, value, threshold):
+        """Return all items whose hash is within `threshold` bits of `value`."""
+        if self.root is None:
+            return []
+        matches = []
+        stack = [self.root]
+        while stack:
+            node_value, items, children = stack.pop()
+            distance = hamming_distance(value, node_value)
+            if distance <= threshold:
+                matches.extend(items)
+            # Triangle inequality: only children in [d - t, d + t] can match
+            for child_distance, child in children.items():
+                if distance - threshold <= child_distance <= distance + threshold:
+                    stack.append(child)
+        return matches
+
+def compute_hashes(root, index=None, workers=None):
+    """Hash every image under a local dataset root; returns {(patient, stem): hash}."""
+    if index is None:
+        index = build_dataset_index(root)
+    tasks = [(patient_id, os.path.splitext(filename)[0], os.path.join(root, patient_id, 'images', filename))
+             for patient_id in sorted(index)
+             for filename in sorted(index[patient_id]['images'])]
+
+    hashes = {}
+    with Pool(processes=workers or os.cpu_count()) as pool:
+        for patient_id, stem, value in pool.imap_unordered(_hash_task, tasks, chunksize=16):
+            if value is not None:
+                hashes[(patient_id, stem)] = value
+    return hashes
+
+def find_duplicate_clusters(hashes, threshold=DEFAULT_THRESHOLD):
+    """Group frames whose hashes are within `threshold` bits into clusters."""
+    tree = BKTree()
+    for key, value in hashes.items():
+        tree.add(value, key)
+
+    # Union-find over near-duplicate links
+    parent = {key: key for key in hashes}
+
+    def find(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    for key, value in hashes.items():
+        for match in tree.query(value, threshold):
+            if match != key:
+                parent[find(match)] = find(key)
+
+    clusters = {}
+    for key in hashes:
+        clusters.setdefault(find(key), []).append(key)
+    return sorted((sorted(members) for members in clusters.values() if len(members) > 1),
+                  key=lambda members: members[0])
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate frames with a perceptual hash")
+    parser.add_argument('root', help="Local copy of the SCOPE_HN dataset")
+    parser.add_argument('--threshold', type=int, default=DEFAULT_THRESHOLD,
+                        help=f"Maximum Hamming distance between 64-bit hashes (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    print("=== SCOPE-HN Dataset: Near-Duplicate Frame Analysis ===\n")
+
+    hashes = compute_hashes(args.root, workers=args.workers)
+    print(f"Hashed {len(hashes)} images")
+
+    clusters = find_duplicate_clusters(hashes, args.threshold)
+    within = [c for c in clusters if len({patient_id for patient_id, _ in c}) == 1]
+    across = [c for c in clusters if len({patient_id for patient_id, _ in c}) > 1]
+
+    if within:
+        print("\n=== NEAR-DUPLICATES WITHIN A PATIENT ===")
+        for cluster in within:
+            print(f"Patient {cluster[0][0]}: {', '.join(stem for _, stem in cluster)}")
+
+    if across:
+        print("\n=== NEAR-DUPLICATES ACROSS PATIENTS ===")
+        for cluster in across:
+            print(", ".join(f"{stem} (patient {patient_id})" for patient_id, stem in cluster))
+
+    duplicated_frames = sum(len(c) for c in clusters)
+    print("\n=== SUMMARY ===")
+    print(f"Hamming threshold: {args.threshold}")
+    print(f"Clusters within a patient: {len(within)}")
+    print(f"Clusters across patients: {len(across)}")
+    print(f"Frames in near-duplicate clusters: {duplicated_frames}")
+    print(f"Redundant frames (cluster size - 1): {duplicated_frames - len(clusters)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Header-only metadata index for SCOPE_HN images and masks.
+
+Reads only the file headers (lazy PIL Image.open, no pixel decoding) of every
+image and mask in a local copy of the dataset, using a thread pool since the
+work is I/O bound. Results are stored as a columnar .npz table with one row
+per SCOPE_HN_XXX_N stem and image_*/mask_* columns for dimensions, mode,
+format, palette size and byte size. Checks such as image/mask dimension
+mismatches then run as vectorized comparisons over the table.
+
+Usage:
+    python image_metadata_index.py /path/to/SCOPE_HN [--output metadata_index.npz] [--workers N]
+"""
+
+import argparse
+import os
+import time
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+from PIL import Image
+
+from find_image_mask_discrepancy import build_dataset_index
+
+DEFAULT_INDEX_PATH = "metadata_index.npz"
+
+def read_header(path):
+    """Read dimensions, mode, format and palette size without decoding pixels."""
+    with Image.open(path) as img:
+        palette_colors = 0
+        if img.palette is not None:
+            channels = len(img.palette.rawmode or img.palette.mode)
+            palette_colors = len(img.palette.palette) // channels
+        return {
+            'width': img.size[0],
+            'height': img.size[1],
+            'mode': img.mode,
+            'format': img.format or '',
+            'palette_colors': palette_colors,
+            'bytes': os.path.getsize(path),
+        }
+
+def _header_task(task):
+    stem, folder, path = task
+    try:
+        return stem, folder, read_header(path)
+    except Exception as e:
+        print(f"Warning: could not read header of {path}: {e}")
+        return stem, folder, None
+
+def build_metadata_index(root, index=None, workers=None):
+    """Read the headers of every image and mask and return a columnar table."""
+    if index is None:
+        index = build_dataset_index(root)
+
+    stems = []
+    patient_ids = []
+    tasks = []
+    for patient_id in sorted(index):
+        by_stem = {}
+        for folder in ('images', 'masks'):
+            for filename in index[patient_id][folder]:
+                stem = os.path.splitext(filename)[0]
+                by_stem.setdefault(stem, []).append((folder, os.path.join(root, patient_id, folder, filename)))
+        for stem in sorted(by_stem):
+            stems.append(stem)
+            patient_ids.append(patient_id)
+            tasks.extend((stem, folder, path) for folder, path in by_stem[stem])
+
+    n = len(stems)
+    row_of = {stem: row for row, stem in enumerate(stems)}
+    # -1 / '' mark a missing or unreadable file
+    table = {'stems': np.array(stems, dtype=str), 'patient_ids': np.array(patient_ids, dtype=str)}
+    for prefix in ('image', 'mask'):
+        for column in ('width', 'height', 'palette_colors'):
+            table[f"{prefix}_{column}"] = np.full(n, -1, dtype=np.int32)
+        table[f"{prefix}_bytes"] = np.full(n, -1, dtype=np.int64)
+        table[f"{prefix}_mode"] = np.full(n, '', dtype='U8')
+        table[f"{prefix}_format"] = np.full(n, '', dtype='U8')
+
+    with ThreadPool(processes=workers or min(32, (os.cpu_count() or 1) * 4)) as pool:
+        for stem, folder, header in pool.imap_unordered(_header_task, tasks, chunksize=16):
+            if header is None:
+                continue
+            prefix = 'image' if folder == 'images' else 'mask'
+            row = row_of[stem]
+            for column, value in header.items():
+                table[f"{prefix}_{column}"][row] = value
+
+    return table
+
+def save_metadata_index(table, index_path=DEFAULT_INDEX_PATH):
+    """Write a metadata table to a compressed .npz file."""
+    np.savez_compressed(index_path, **table)
+
+def load_metadata_index(index_path=DEFAULT_INDEX_PATH):
+    """Load a metadata table as a dict of column arrays, or None if missing."""
+    if not os.path.exists(index_path):
+        return None
+    with np.load(index_path) as data:
+        return {key: data[key] for key in data.files}
+
+def find_dimension_mismatches(table):
+    """Return the stems whose image and mask are both present but differ in size."""
+    present = (table['image_width'] >= 0) & (table['mask_width'] >= 0)
+    mismatch = present & ((table['image_width'] != table['mask_width'])
+                          | (table['image_height'] != table['mask_height']))
+    return table['stems'][mismatch]
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a header-only image/mask metadata index")
+    parser.add_argument('root', help="Local copy of the SCOPE_HN dataset")
+    parser.add_argument('--output', default=DEFAULT_INDEX_PATH, help="Output .npz file")
+    parser.add_argument('--workers', type=int, default=None, help="Reader threads")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = build_metadata_index(args.root, workers=args.workers)
+    save_metadata_index(table, args.output)
+    print(f"Indexed {len(table['stems'])} stems in {time.perf_counter() - start:.2f}s -> {args.output}")
+
+    start = time.perf_counter()
+    mismatches = find_dimension_mismatches(table)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"Dimension check: {len(mismatches)} mismatched pair(s) ({elapsed_ms:.2f} ms)")
+    for stem in mismatches:
+        row = int(np.flatnonzero(table['stems'] == stem)[0])
+        print(f"  {stem}: image {table['image_width'][row]}x{table['image_height'][row]}, "
+              f"mask {table['mask_width'][row]}x{table['mask_height'][row]}")
+
+    unexpected = table['stems'][(table['mask_width'] >= 0) & ~np.isin(table['mask_mode'], ['P', 'L'])]
+    if unexpected.size:
+        print(f"Masks not in indexed (P) or grayscale (L) mode: {', '.join(unexpected)}")
+
+if __name__ == "__main__":
+    main()
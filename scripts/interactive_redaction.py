@@ -1,10 +1,20 @@
 #!/usr/bin/env python3
 """
 Interactive PHI redaction tool using matplotlib for frame display and bounding box selection.
+
+A video can have several redaction regions: each drag adds one, 'Clear'
+removes them all. Saved entries keep every region in the coordinate-file
+'regions' format ({"coordinates": [x1, y1, x2, y2]}); single-region entries
+also keep the original x/y/width/height fields.
+
+Regions proposed by propose_redaction.py (redaction_proposals.json) are shown
+for videos without saved coordinates; click 'Save' to accept them as is, or
+'Clear' and drag new boxes first.
 """
 
 import os
 import json
+import math
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from matplotlib.widgets import Button
@@ -12,6 +22,19 @@ import numpy as np
 from PIL import Image
 import glob
 
+def entry_regions(entry):
+    """(x, y, width, height) of every region in a saved or proposed entry."""
+    if 'regions' in entry:
+        boxes = []
+        for region in entry['regions']:
+            x1, y1, x2, y2 = region['coordinates']
+            boxes.append((min(x1, x2), min(y1, y2), abs(x2 - x1), abs(y2 - y1)))
+        return boxes
+    return [(entry['x'], entry['y'], entry['width'], entry['height'])]
+
+def describe_regions(regions):
+    return '; '.join(f"x={x}, y={y}, w={w}, h={h}" for x, y, w, h in regions)
+
 class RedactionSelector:
     def __init__(self):
         self.coordinates = {}
@@ -19,8 +42,8 @@ class RedactionSelector:
         self.current_frame_path = None
         self.video_files = []
         self.current_index = 0
-        self.bbox = None
-        self.rect = None
+        self.regions = []
+        self.rects = []
         self.start_point = None
         
         # Load existing coordinates if available
@@ -28,6 +51,13 @@ class RedactionSelector:
             with open('redaction_coordinates.json', 'r') as f:
                 self.coordinates = json.load(f)
         
+        # Load automatic proposals if available
+        self.proposals = {}
+        if os.path.exists('redaction_proposals.json'):
+            with open('redaction_proposals.json', 'r') as f:
+                self.proposals = json.load(f)
+            print(f"Loaded {len(self.proposals)} proposed redaction boxes")
+        
         # Get list of sample frames
         self.frame_files = sorted(glob.glob('sample_frames/*.jpg'))
         self.video_files = [os.path.basename(f).replace('_sample.jpg', '.mp4') for f in self.frame_files]
@@ -88,10 +118,15 @@ class RedactionSelector:
         self.ax.imshow(img_array)
         self.ax.set_title(f'Video: {self.current_video} ({self.current_index + 1}/{len(self.video_files)})')
         
-        # Load existing bounding box if available
+        # Load existing regions if available, otherwise the proposed ones
+        self.rects = []
+        self.regions = []
         if self.current_video in self.coordinates:
-            coords = self.coordinates[self.current_video]
-            self.draw_bbox(coords['x'], coords['y'], coords['width'], coords['height'])
+            for x, y, width, height in entry_regions(self.coordinates[self.current_video]):
+                self.draw_bbox(x, y, width, height)
+        elif self.current_video in self.proposals:
+            for x, y, width, height in entry_regions(self.proposals[self.current_video]):
+                self.draw_bbox(x, y, width, height, color='orange')
         
         # Update progress info
         completed = len(self.coordinates)
@@ -101,24 +136,27 @@ class RedactionSelector:
                     verticalalignment='top')
         
         if self.current_video in self.coordinates:
-            coords = self.coordinates[self.current_video]
-            coord_text = f"Saved: x={coords['x']}, y={coords['y']}, w={coords['width']}, h={coords['height']}"
+            coord_text = "Saved: " + describe_regions(self.regions)
             self.ax.text(0.02, 0.02, coord_text, transform=self.ax.transAxes,
                         bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgreen", alpha=0.7),
                         verticalalignment='bottom')
+        elif self.current_video in self.proposals:
+            coord_text = (f"Proposed: {describe_regions(self.regions)}"
+                          f" - 'Save' to accept, or 'Clear' and drag to adjust")
+            self.ax.text(0.02, 0.02, coord_text, transform=self.ax.transAxes,
+                        bbox=dict(boxstyle="round,pad=0.3", facecolor="orange", alpha=0.7),
+                        verticalalignment='bottom')
         
         plt.draw()
     
-    def draw_bbox(self, x, y, width, height):
-        """Draw bounding box on the image."""
-        if self.rect:
-            self.rect.remove()
-        
-        self.rect = patches.Rectangle((x, y), width, height, 
-                                    linewidth=2, edgecolor='red', 
-                                    facecolor='red', alpha=0.3)
-        self.ax.add_patch(self.rect)
-        self.bbox = {'x': x, 'y': y, 'width': width, 'height': height}
+    def draw_bbox(self, x, y, width, height, color='red'):
+        """Draw a bounding box on the image and add it to the current regions."""
+        rect = patches.Rectangle((x, y), width, height, 
+                                 linewidth=2, edgecolor=color, 
+                                 facecolor=color, alpha=0.3)
+        self.ax.add_patch(rect)
+        self.rects.append(rect)
+        self.regions.append((x, y, width, height))
     
     def on_press(self, event):
         """Handle mouse press event."""
@@ -133,14 +171,14 @@ class RedactionSelector:
         
         end_point = (event.xdata, event.ydata)
         
-        # Calculate bounding box
-        x = min(self.start_point[0], end_point[0])
-        y = min(self.start_point[1], end_point[1])
-        width = abs(end_point[0] - self.start_point[0])
-        height = abs(end_point[1] - self.start_point[1])
+        # Calculate bounding box, rounded outward to whole pixels
+        x = math.floor(min(self.start_point[0], end_point[0]))
+        y = math.floor(min(self.start_point[1], end_point[1]))
+        width = math.ceil(max(self.start_point[0], end_point[0])) - x
+        height = math.ceil(max(self.start_point[1], end_point[1])) - y
         
         if width > 5 and height > 5:  # Minimum size
-            self.draw_bbox(int(x), int(y), int(width), int(height))
+            self.draw_bbox(x, y, width, height)
             plt.draw()
         
         self.start_point = None
@@ -178,18 +216,19 @@ class RedactionSelector:
             self.load_current_frame()
     
     def save_coordinates(self, event):
-        """Save current bounding box coordinates."""
-        if not self.bbox:
+        """Save every current region for this video."""
+        if not self.regions:
             print("No bounding box selected!")
             return
         
-        self.coordinates[self.current_video] = {
-            'x': self.bbox['x'],
-            'y': self.bbox['y'],
-            'width': self.bbox['width'],
-            'height': self.bbox['height'],
+        entry = {
+            'regions': [{'coordinates': [x, y, x + width, y + height]} for x, y, width, height in self.regions],
             'video_file': self.current_video
         }
+        if len(self.regions) == 1:
+            x, y, width, height = self.regions[0]
+            entry.update({'x': x, 'y': y, 'width': width, 'height': height})
+        self.coordinates[self.current_video] = entry
         
         # Save to file immediately
         with open('redaction_coordinates.json', 'w') as f:
@@ -199,11 +238,11 @@ class RedactionSelector:
         self.load_current_frame()  # Refresh display
     
     def clear_bbox(self, event):
-        """Clear current bounding box."""
-        if self.rect:
-            self.rect.remove()
-            self.rect = None
-        self.bbox = None
+        """Clear every current region."""
+        for rect in self.rects:
+            rect.remove()
+        self.rects = []
+        self.regions = []
         plt.draw()
     
     def export_json(self, event):
@@ -215,8 +254,8 @@ class RedactionSelector:
     def run(self):
         """Start the interactive session."""
         print("\nInstructions:")
-        print("1. Click and drag on the image to select redaction area")
-        print("2. Click 'Save' to save coordinates for current video")
+        print("1. Click and drag on the image to add a redaction area ('Clear' removes all)")
+        print("2. Click 'Save' to save all areas for current video")
         print("3. Use 'Next'/'Previous' to navigate between videos")
         print("4. Click 'Export JSON' when done to save all coordinates")
         print("5. Close the window when finished")
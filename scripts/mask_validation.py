@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Pixel-level validation of SCOPE_HN image/mask pairs.
+
+Filename pairing alone cannot catch a mask with the wrong size, palette
+indices outside the semantic classes, or a corrupt PNG. This module decodes
+every pair in a local copy of the dataset and checks:
+1. Image and mask decode cleanly
+2. Image and mask dimensions match
+3. Mask values are valid class indices (0 = unlabeled, 1-12 = classes)
+4. The mask is not empty (has at least one labeled pixel)
+
+Pairs are checked across a process pool; each worker holds a single pair in
+memory at a time, so peak memory is bounded by the number of workers.
+"""
+
+import os
+from multiprocessing import Pool
+
+import numpy as np
+from PIL import Image
+
+from find_image_mask_discrepancy import build_dataset_index, find_discrepancies_by_patient
+
+NUM_CLASSES = 12
+
+def check_pair(task):
+    """Decode one image/mask pair and return (patient_id, stem, problems)."""
+    patient_id, stem, image_path, mask_path, num_classes = task
+    problems = []
+
+    try:
+        with Image.open(image_path) as img:
+            img.load()
+            image_size = img.size
+    except Exception as e:
+        return patient_id, stem, [f"corrupt image: {e}"]
+
+    try:
+        with Image.open(mask_path) as mask:
+            mask.load()
+            mask_size = mask.size
+            mask_mode = mask.mode
+            values = np.asarray(mask) if mask_mode in ('P', 'L') else None
+    except Exception as e:
+        return patient_id, stem, [f"corrupt mask: {e}"]
+
+    if image_size != mask_size:
+        problems.append(f"size mismatch: image {image_size[0]}x{image_size[1]}, "
+                        f"mask {mask_size[0]}x{mask_size[1]}")
+
+    if values is None:
+        problems.append(f"unexpected mask mode {mask_mode} (expected indexed P or L)")
+        return patient_id, stem, problems
+
+    counts = np.bincount(values.ravel(), minlength=256)
+    stray = np.flatnonzero(counts[num_classes + 1:]) + num_classes + 1
+    if stray.size:
+        problems.append(f"values outside 0-{num_classes}: {stray.tolist()}")
+    if counts[0] == values.size:
+        problems.append("empty mask")
+
+    return patient_id, stem, problems
+
+def _pair_tasks(root, index, num_classes):
+    """Yield one check_pair task per matching image/mask stem."""
+    for patient_id in sorted(index):
+        images = {os.path.splitext(f)[0]: f for f in index[patient_id]['images']}
+        masks = {os.path.splitext(f)[0]: f for f in index[patient_id]['masks']}
+        for stem in sorted(images.keys() & masks.keys()):
+            yield (patient_id, stem,
+                   os.path.join(root, patient_id, 'images', images[stem]),
+                   os.path.join(root, patient_id, 'masks', masks[stem]),
+                   num_classes)
+
+def validate_pixels(root, index=None, workers=None, num_classes=NUM_CLASSES):
+    """
+    Run pixel-level checks on every matching pair under a local dataset root.
+
+    Returns a dict mapping patient_id to the find_discrepancies_by_patient
+    result extended with 'invalid_pairs' (stem -> list of problems),
+    'total_invalid' and 'total_valid'.
+    """
+    if index is None:
+        index = build_dataset_index(root)
+
+    results = {}
+    for patient_id in index:
+        analysis = find_discrepancies_by_patient(patient_id, index)
+        analysis['invalid_pairs'] = {}
+        results[patient_id] = analysis
+
+    with Pool(processes=workers or os.cpu_count(), maxtasksperchild=200) as pool:
+        for patient_id, stem, problems in pool.imap_unordered(
+                check_pair, _pair_tasks(root, index, num_classes), chunksize=4):
+            if problems:
+                results[patient_id]['invalid_pairs'][stem] = problems
+
+    for analysis in results.values():
+        analysis['total_invalid'] = len(analysis['invalid_pairs'])
+        analysis['total_valid'] = analysis['total_matches'] - analysis['total_invalid']
+
+    return results
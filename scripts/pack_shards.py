@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Pack SCOPE_HN image/mask pairs into memory-mapped uint8 training shards.
+
+Every matching pair from the {patient}/images|masks layout is decoded once
+and written as raw bytes: the RGB image (H x W x 3) followed by the class
+index mask (H x W). Shards hold one patient each, or a fixed number of
+frames with --frames-per-shard. A small JSON index records the shard, byte
+offsets and shape of every sample, so ShardReader can return zero-copy
+NumPy views into np.memmap'ed shards instead of opening and decoding files.
+
+Usage:
+    python pack_shards.py /path/to/SCOPE_HN /path/to/shards [--frames-per-shard 64] [--workers N]
+"""
+
+import argparse
+import json
+import os
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+
+import numpy as np
+from PIL import Image
+
+from find_image_mask_discrepancy import build_dataset_index, find_discrepancies_by_patient
+
+INDEX_FILENAME = "index.json"
+ALIGNMENT = 64
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def _decode_pair(task):
+    """Decode one pair to (image, mask) uint8 arrays, or None if unusable."""
+    patient_id, stem, image_path, mask_path = task
+    try:
+        with Image.open(image_path) as img:
+            image = np.asarray(img.convert('RGB'), dtype=np.uint8)
+        with Image.open(mask_path) as mask:
+            mask_array = np.asarray(mask, dtype=np.uint8)
+    except Exception as e:
+        print(f"Warning: skipping {stem}: {e}")
+        return patient_id, stem, None
+    if mask_array.ndim != 2 or mask_array.shape != image.shape[:2]:
+        print(f"Warning: skipping {stem}: image {image.shape[:2]} and mask {mask_array.shape} do not match")
+        return patient_id, stem, None
+    return patient_id, stem, (image, mask_array)
+
+def _pair_tasks(root, index):
+    for patient_id in sorted(index):
+        analysis = find_discrepancies_by_patient(patient_id, index)
+        images = {os.path.splitext(f)[0]: f for f in analysis['images']}
+        masks = {os.path.splitext(f)[0]: f for f in analysis['masks']}
+        for stem in sorted(analysis['matching_pairs']):
+            yield (patient_id, stem,
+                   os.path.join(root, patient_id, 'images', images[stem]),
+                   os.path.join(root, patient_id, 'masks', masks[stem]))
+
+def _decoded_pairs(pool, tasks, window):
+    """Decode tasks in dataset order with at most `window` pairs in flight or waiting to be written."""
+    tasks = iter(tasks)
+    pending = deque(pool.apply_async(_decode_pair, (task,)) for task in islice(tasks, window))
+    while pending:
+        result = pending.popleft().get()
+        for task in islice(tasks, 1):
+            pending.append(pool.apply_async(_decode_pair, (task,)))
+        yield result
+
+def pack_shards(root, out_dir, frames_per_shard=None, index=None, workers=None):
+    """
+    Write shards and the offset index for every matching pair under `root`.
+
+    Without frames_per_shard each patient gets its own shard. Returns the
+    index dict that is also written to out_dir/index.json.
+    """
+    if index is None:
+        index = build_dataset_index(root)
+    os.makedirs(out_dir, exist_ok=True)
+
+    samples = []
+    shards = []
+    shard_file = None
+    shard_key = None
+    offset = 0
+
+    try:
+        workers = workers or os.cpu_count()
+        with Pool(processes=workers) as pool:
+            # A sliding window keeps dataset order and bounds decoded pairs held in memory
+            for patient_id, stem, pair in _decoded_pairs(pool, _pair_tasks(root, index), 2 * workers):
+                if pair is None:
+                    continue
+                image, mask = pair
+
+                key = patient_id if frames_per_shard is None else len(samples) // frames_per_shard
+                if key != shard_key:
+                    if shard_file is not None:
+                        shard_file.close()
+                    shard_name = (f"patient_{patient_id}.bin" if frames_per_shard is None
+                                  else f"shard_{key:05d}.bin")
+                    shards.append(shard_name)
+                    shard_file = open(os.path.join(out_dir, shard_name), 'wb')
+                    shard_key = key
+                    offset = 0
+
+                image_offset = offset
+                shard_file.write(image.tobytes())
+                mask_offset = image_offset + image.nbytes
+                shard_file.write(mask.tobytes())
+                offset = _aligned(mask_offset + mask.nbytes)
+                shard_file.write(b'\0' * (offset - mask_offset - mask.nbytes))
+
+                samples.append({
+                    'stem': stem,
+                    'patient_id': patient_id,
+                    'shard': len(shards) - 1,
+                    'image_offset': image_offset,
+                    'mask_offset': mask_offset,
+                    'height': image.shape[0],
+                    'width': image.shape[1],
+                })
+    finally:
+        if shard_file is not None:
+            shard_file.close()
+
+    shard_index = {'version': 1, 'shards': shards, 'samples': samples}
+    with open(os.path.join(out_dir, INDEX_FILENAME), 'w') as f:
+        json.dump(shard_index, f)
+    return shard_index
+
+class ShardReader:
+    """Random access to packed samples as zero-copy views into memory-mapped shards."""
+
+    def __init__(self, shard_dir):
+        with open(os.path.join(shard_dir, INDEX_FILENAME), 'r') as f:
+            shard_index = json.load(f)
+        self.samples = shard_index['samples']
+        self.stems = [s['stem'] for s in self.samples]
+        self._positions = {stem: i for i, stem in enumerate(self.stems)}
+        self._shards = [np.memmap(os.path.join(shard_dir, name), dtype=np.uint8, mode='r')
+                        for name in shard_index['shards']]
+
+    def __len__(self):
+        return len(self.samples)
+
+    def __getitem__(self, i):
+        """Return (image, mask) as read-only views: (H, W, 3) and (H, W) uint8."""
+        sample = self.samples[i]
+        shard = self._shards[sample['shard']]
+        h, w = sample['height'], sample['width']
+        image = shard[sample['image_offset']:sample['image_offset'] + h * w * 3].reshape(h, w, 3)
+        mask = shard[sample['mask_offset']:sample['mask_offset'] + h * w].reshape(h, w)
+        return image, mask
+
+    def get(self, stem):
+        """Look up a sample by its SCOPE_HN_XXX_N stem."""
+        return self[self._positions[stem]]
+
+    def patient_indices(self, patient_id):
+        """Positions of all samples belonging to one patient."""
+        return [i for i, s in enumerate(self.samples) if s['patient_id'] == patient_id]
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack image/mask pairs into memory-mapped shards")
+    parser.add_argument('root', help="Local copy of the SCOPE_HN dataset")
+    parser.add_argument('out_dir', help="Output directory for shards and index.json")
+    parser.add_argument('--frames-per-shard', type=int, default=None,
+                        help="Frames per shard (default: one shard per patient)")
+    parser.add_argument('--workers', type=int, default=None, help="Decoder processes (default: CPU count)")
+    args = parser.parse_args()
+
+    shard_index = pack_shards(args.root, args.out_dir, args.frames_per_shard, workers=args.workers)
+    total_bytes = sum(os.path.getsize(os.path.join(args.out_dir, name)) for name in shard_index['shards'])
+    print(f"Packed {len(shard_index['samples'])} pairs into {len(shard_index['shards'])} shards "
+          f"({total_bytes / (1024*1024):.1f} MB) in {args.out_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Framework-neutral batch loader for SCOPE_HN image/mask pairs.
+
+Reads the {patient}/images|masks layout of a local dataset copy and yields
+batches of decoded (image, mask) arrays. Decoding happens in a pool of worker
+processes, with at most `prefetch` batches in flight ahead of the consumer.
+Decoded arrays are kept in an LRU cache bounded in bytes, shared by every
+epoch and iterator of the loader, so repeated epochs skip decoding entirely
+when the cache is large enough. With pyramid_dir/pyramid_size the loader
+reads downsampled files written by build_pyramid_cache.py instead of the
+full-resolution sources. For the fastest possible reads, pack the dataset
+once with pack_shards.py instead.
+
+Usage:
+    python pair_loader.py /path/to/SCOPE_HN [--batch-size 8] [--workers N] [--epochs 2]
+"""
+
+import argparse
+import os
+import random
+import time
+from collections import OrderedDict, deque
+from multiprocessing import Pool
+
+import numpy as np
+from PIL import Image
+
+from build_pyramid_cache import pyramid_root
+from find_image_mask_discrepancy import build_dataset_index, find_discrepancies_by_patient
+
+DEFAULT_CACHE_MB = 1024
+
+def load_pair(image_path, mask_path):
+    """Decode one pair to an (H, W, 3) RGB array and an (H, W) class-index array."""
+    with Image.open(image_path) as img:
+        image = np.asarray(img.convert('RGB'), dtype=np.uint8)
+    with Image.open(mask_path) as mask:
+        mask_array = np.asarray(mask, dtype=np.uint8)
+    return image, mask_array
+
+def _load_task(task):
+    stem, image_path, mask_path = task
+    image, mask = load_pair(image_path, mask_path)
+    return stem, image, mask
+
+class LRUCache:
+    """Least-recently-used cache of decoded pairs, bounded by total bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._items = OrderedDict()
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+        return item
+
+    def put(self, key, image, mask):
+        size = image.nbytes + mask.nbytes
+        if size > self.max_bytes or key in self._items:
+            return
+        self._items[key] = (image, mask)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (old_image, old_mask) = self._items.popitem(last=False)
+            self.bytes -= old_image.nbytes + old_mask.nbytes
+
+    def __len__(self):
+        return len(self._items)
+
+class PairLoader:
+    """
+    Iterate over image/mask pairs in batches with multi-process prefetching.
+
+    Each batch is a dict with 'stems', 'images' and 'masks' lists (frames can
+    differ in resolution, so arrays are not stacked). Use as a context manager
+    or call close() to shut the worker pool down.
+    """
+
+    def __init__(self, root, patients=None, batch_size=8, workers=None, prefetch=4,
+                 cache_mb=DEFAULT_CACHE_MB, shuffle=False, seed=0, index=None,
+                 pyramid_dir=None, pyramid_size=None):
+        if index is None:
+            index = build_dataset_index(root)
+        selected = sorted(index) if patients is None else sorted(set(patients) & set(index))
+        if pyramid_dir is not None and pyramid_size is not None:
+            root = pyramid_root(pyramid_dir, pyramid_size)
+
+        self.pairs = []
+        for patient_id in selected:
+            analysis = find_discrepancies_by_patient(patient_id, index)
+            images = {os.path.splitext(f)[0]: f for f in analysis['images']}
+            masks = {os.path.splitext(f)[0]: f for f in analysis['masks']}
+            for stem in sorted(analysis['matching_pairs']):
+                self.pairs.append((stem,
+                                   os.path.join(root, patient_id, 'images', images[stem]),
+                                   os.path.join(root, patient_id, 'masks', masks[stem])))
+
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count()
+        self.prefetch = max(1, prefetch)
+        self.shuffle = shuffle
+        self.cache = LRUCache(cache_mb * 1024 * 1024)
+        self._rng = random.Random(seed)
+        self._pool = None
+
+    def __len__(self):
+        """Number of batches per epoch."""
+        return (len(self.pairs) + self.batch_size - 1) // self.batch_size
+
+    def _submit(self, batch):
+        """Start decoding the uncached samples of a batch; cached ones are taken now."""
+        slots = []
+        for task in batch:
+            cached = self.cache.get(task[0])
+            if cached is not None:
+                slots.append((task[0], cached))
+            else:
+                slots.append((task[0], self._pool.apply_async(_load_task, (task,))))
+        return slots
+
+    def _collect(self, slots):
+        stems, images, masks = [], [], []
+        for stem, slot in slots:
+            if isinstance(slot, tuple):
+                image, mask = slot
+            else:
+                _, image, mask = slot.get()
+                self.cache.put(stem, image, mask)
+            stems.append(stem)
+            images.append(image)
+            masks.append(mask)
+        return {'stems': stems, 'images': images, 'masks': masks}
+
+    def __iter__(self):
+        if self._pool is None:
+            self._pool = Pool(processes=self.workers)
+
+        order = list(self.pairs)
+        if self.shuffle:
+            self._rng.shuffle(order)
+        batches = [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+
+        pending = deque()
+        next_batch = 0
+        while next_batch < len(batches) or pending:
+            # Keep up to `prefetch` batches decoding ahead of the consumer
+            while next_batch < len(batches) and len(pending) < self.prefetch:
+                pending.append(self._submit(batches[next_batch]))
+                next_batch += 1
+            yield self._collect(pending.popleft())
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure image/mask loading throughput")
+    parser.add_argument('root', help="Local copy of the SCOPE_HN dataset")
+    parser.add_argument('--patients', default=None, help="Comma-separated patient ids to load")
+    parser.add_argument('--batch-size', type=int, default=8, help="Pairs per batch")
+    parser.add_argument('--workers', type=int, default=None, help="Decoder processes (default: CPU count)")
+    parser.add_argument('--prefetch', type=int, default=4, help="Batches decoded ahead of the consumer")
+    parser.add_argument('--cache-mb', type=int, default=DEFAULT_CACHE_MB, help="Decoded-array cache size")
+    parser.add_argument('--epochs', type=int, default=2, help="Passes over the data")
+    parser.add_argument('--pyramid-dir', default=None, help="Cache written by build_pyramid_cache.py")
+    parser.add_argument('--size', type=int, default=None, help="Resolution level to read from --pyramid-dir")
+    args = parser.parse_args()
+
+    patients = args.patients.split(',') if args.patients else None
+    with PairLoader(args.root, patients, args.batch_size, args.workers, args.prefetch,
+                    args.cache_mb, shuffle=True, pyramid_dir=args.pyramid_dir,
+                    pyramid_size=args.size) as loader:
+        print(f"Loading {len(loader.pairs)} pairs in {len(loader)} batches of {args.batch_size}")
+        for epoch in range(1, args.epochs + 1):
+            start = time.perf_counter()
+            frames = sum(len(batch['stems']) for batch in loader)
+            elapsed = time.perf_counter() - start
+            print(f"Epoch {epoch}: {frames} frames in {elapsed:.2f}s ({frames / elapsed:.0f} frames/s, "
+                  f"cache {len(loader.cache)} pairs / {loader.cache.bytes / (1024*1024):.0f} MB)")
+
+if __name__ == "__main__":
+    main()
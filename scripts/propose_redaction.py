@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Propose PHI redaction boxes from temporal pixel statistics.
+
+Burned-in overlays (patient name, date, device text, logos) are static and
+full of sharp edges, while the endoscopic view changes constantly. For each
+video, ffmpeg streams downsampled grayscale frames into NumPy and two
+per-pixel statistics are updated frame by frame in constant memory:
+
+- temporal mean and variance (Welford's online algorithm)
+- edge persistence: the share of frames in which the pixel sits on a strong
+  edge and its whole 3x3 neighbourhood is unchanged since the previous frame
+
+Candidate pixels are those with high edge persistence, or with at least half
+that persistence and a low temporal standard deviation: a pixel that barely
+changes over the whole video is static even when its edge is faint or the
+overlay is hidden for a while. Candidates are grouped into regions on a coarse grid.
+Each region is written as its own box in the coordinate-file 'regions' format
+({"coordinates": [x1, y1, x2, y2]}), so overlays in opposite corners do not
+merge into one box over the endoscopic view. interactive_redaction.py
+pre-loads them for the reviewer to confirm or adjust. Overlays shown only
+part of the time still score their share of frames.
+
+Usage:
+    python propose_redaction.py [--video-dir rau_so_seg_videos] [--output redaction_proposals.json]
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import subprocess
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+from verify_redaction import iter_gray_frames, probe_dimensions
+
+DEFAULT_PROPOSALS_PATH = "redaction_proposals.json"
+EDGE_LEVEL = 40          # Gradient magnitude of an edge pixel
+STABLE_LEVEL = 8         # Largest change that still counts as unchanged between samples
+MIN_PERSISTENCE = 0.25   # Share of frames a pixel must be a stable edge in
+MAX_STATIC_STD = 6.0     # Temporal std at or below which half of min_persistence suffices
+GRID = 8                 # Cell size (downsampled pixels) used to group candidate pixels
+MIN_CELL_PIXELS = 3      # Candidate pixels needed to mark a cell
+
+class TemporalStats:
+    """Per-pixel running statistics over a stream of equally sized grayscale frames."""
+
+    def __init__(self, height, width):
+        self.count = 0
+        self.mean = np.zeros((height, width), dtype=np.float32)
+        self.m2 = np.zeros((height, width), dtype=np.float32)
+        self.stable_edges = np.zeros((height, width), dtype=np.uint32)
+        self._previous = None
+
+    def update(self, frame):
+        values = frame.astype(np.float32)
+        # Welford: running mean and sum of squared deviations
+        self.count += 1
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (values - self.mean)
+
+        gradient = np.zeros_like(values)
+        gradient[:, :-1] = np.abs(np.diff(values, axis=1))
+        gradient[:-1, :] = np.maximum(gradient[:-1, :], np.abs(np.diff(values, axis=0)))
+        if self._previous is not None:
+            change = _max3x3(np.abs(values - self._previous))
+            self.stable_edges += (gradient >= EDGE_LEVEL) & (change <= STABLE_LEVEL)
+        self._previous = values
+
+    @property
+    def variance(self):
+        return self.m2 / max(1, self.count - 1)
+
+    @property
+    def persistence(self):
+        return self.stable_edges / max(1, self.count - 1)
+
+def _max3x3(values):
+    """Maximum over each pixel's 3x3 neighbourhood."""
+    padded = np.pad(values, 1, mode='edge')
+    height, width = values.shape
+    result = values.copy()
+    for dy in range(3):
+        for dx in range(3):
+            np.maximum(result, padded[dy:dy + height, dx:dx + width], out=result)
+    return result
+
+def find_regions(candidates):
+    """Group candidate pixels into regions of touching grid cells; returns (y0, x0, y1, x1) boxes."""
+    height, width = candidates.shape
+    rows, cols = (height + GRID - 1) // GRID, (width + GRID - 1) // GRID
+    padded = np.zeros((rows * GRID, cols * GRID), dtype=bool)
+    padded[:height, :width] = candidates
+    cells = padded.reshape(rows, GRID, cols, GRID).sum(axis=(1, 3)) >= MIN_CELL_PIXELS
+
+    regions = []
+    seen = np.zeros_like(cells)
+    for start in zip(*np.nonzero(cells)):
+        if seen[start]:
+            continue
+        stack = [start]
+        seen[start] = True
+        members = []
+        while stack:
+            r, c = stack.pop()
+            members.append((r, c))
+            # 8-connected, so characters on neighbouring cells join the same region
+            for nr in range(max(0, r - 1), min(rows, r + 2)):
+                for nc in range(max(0, c - 1), min(cols, c + 2)):
+                    if cells[nr, nc] and not seen[nr, nc]:
+                        seen[nr, nc] = True
+                        stack.append((nr, nc))
+        rs = [int(m[0]) for m in members]
+        cs = [int(m[1]) for m in members]
+        regions.append((min(rs) * GRID, min(cs) * GRID,
+                        min(height, (max(rs) + 1) * GRID), min(width, (max(cs) + 1) * GRID)))
+    return regions
+
+def propose_for_video(video_path, sample_fps=2.0, width=320, min_persistence=MIN_PERSISTENCE):
+    """Analyze one video and return a proposal dict (coordinates in full resolution), or None."""
+    full_width, full_height = probe_dimensions(video_path)
+    height = max(2, round(full_height * width / full_width / 2) * 2)
+    stats = TemporalStats(height, width)
+    for frame in iter_gray_frames(video_path, width, height, sample_fps, extra_filter=f'scale={width}:{height}'):
+        stats.update(frame)
+    if stats.count < 2:
+        return None
+
+    persistence = stats.persistence
+    std = np.sqrt(stats.variance)
+    candidates = (persistence >= min_persistence) | ((persistence >= min_persistence / 2) & (std <= MAX_STATIC_STD))
+    regions = find_regions(candidates)
+    if not regions:
+        return None
+
+    scale_x = full_width / width
+    scale_y = full_height / height
+    details = []
+    for y0, x0, y1, x1 in regions:
+        # Round outward so the full-resolution box never falls short of the overlay
+        details.append({
+            'coordinates': [math.floor(x0 * scale_x), math.floor(y0 * scale_y),
+                            min(full_width, math.ceil(x1 * scale_x)), min(full_height, math.ceil(y1 * scale_y))],
+            'persistence': round(float(persistence[y0:y1, x0:x1].max()), 3),
+            'temporal_std': round(float(std[y0:y1, x0:x1].mean()), 1),
+        })
+    return {
+        'regions': details,
+        'video_file': os.path.basename(video_path),
+        'proposed': True,
+        'frames_analyzed': stats.count,
+    }
+
+def _propose_task(task):
+    video_path, sample_fps, width, min_persistence = task
+    try:
+        return os.path.basename(video_path), propose_for_video(video_path, sample_fps, width, min_persistence), None
+    except (subprocess.CalledProcessError, OSError, KeyError, IndexError, ValueError) as e:
+        return os.path.basename(video_path), None, str(e)
+
+def main():
+    parser = argparse.ArgumentParser(description="Propose PHI redaction boxes from static overlay detection")
+    parser.add_argument('--video-dir', default="rau_so_seg_videos", help="Directory of videos to analyze")
+    parser.add_argument('--output', default=DEFAULT_PROPOSALS_PATH, help="Proposals JSON file")
+    parser.add_argument('--sample-fps', type=float, default=2.0, help="Frames per second of video to analyze")
+    parser.add_argument('--width', type=int, default=320, help="Width of the downsampled analysis frames")
+    parser.add_argument('--min-persistence', type=float, default=MIN_PERSISTENCE,
+                        help="Share of frames a pixel must be a static edge in")
+    parser.add_argument('--jobs', type=int, default=None, help="Videos analyzed concurrently (default: CPU count)")
+    args = parser.parse_args()
+
+    video_files = sorted(glob.glob(os.path.join(args.video_dir, "*.mp4")))
+    if not video_files:
+        print(f"No videos found in {args.video_dir}")
+        return
+
+    proposals = {}
+    if os.path.exists(args.output):
+        with open(args.output, 'r') as f:
+            proposals = json.load(f)
+
+    tasks = [(path, args.sample_fps, args.width, args.min_persistence) for path in video_files]
+    with ThreadPool(processes=args.jobs or os.cpu_count()) as pool:
+        for video_file, proposal, error in pool.imap_unordered(_propose_task, tasks):
+            if error:
+                print(f"✗ {video_file}: {error}")
+            elif proposal is None:
+                proposals.pop(video_file, None)
+                print(f"- {video_file}: no static overlay found")
+            else:
+                proposals[video_file] = proposal
+                boxes = ', '.join(str(region['coordinates']) for region in proposal['regions'])
+                print(f"✓ {video_file}: {len(proposal['regions'])} region(s) {boxes}")
+
+    # Write to a temporary file first so an interrupted run never truncates earlier proposals
+    tmp_path = args.output + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(proposals, f, indent=2)
+    os.replace(tmp_path, args.output)
+    print(f"\nSaved {len(proposals)} proposals to {args.output}")
+
+if __name__ == "__main__":
+    main()
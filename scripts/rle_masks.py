@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Run-length-encoded (RLE) representation of the SCOPE_HN class masks.
+
+Each mask is stored as one binary RLE per class present, in the COCO format:
+{'size': [height, width], 'counts': ...} with column-major runs that start
+with a run of zeros. Counts can be kept as an integer array or as the
+compressed COCO string, so the output can be read by pycocotools.
+
+Encoding and decoding are vectorized with NumPy, and area, bounding box,
+intersection and union are computed from the runs without expanding masks.
+
+Usage:
+    python rle_masks.py /path/to/SCOPE_HN masks_rle.jsonl [--workers N]
+"""
+
+import argparse
+import json
+import os
+from multiprocessing import Pool
+
+import numpy as np
+from PIL import Image
+
+from find_image_mask_discrepancy import build_dataset_index
+from mask_validation import NUM_CLASSES
+
+def encode_labels(mask, num_classes=NUM_CLASSES):
+    """
+    Encode a class-index mask as {class_index: binary RLE} for classes 1..num_classes.
+
+    The label image is run-length encoded once; each class's RLE is then
+    derived from the runs carrying that class value.
+    """
+    height, width = mask.shape
+    flat = np.asarray(mask).ravel(order='F')
+    n = flat.size
+    boundaries = np.concatenate(([0], np.flatnonzero(flat[1:] != flat[:-1]) + 1, [n]))
+    starts = boundaries[:-1]
+    lengths = np.diff(boundaries)
+    values = flat[starts]
+
+    rles = {}
+    for class_index in range(1, num_classes + 1):
+        selected = values == class_index
+        if not selected.any():
+            continue
+        fg_starts = starts[selected]
+        fg_lengths = lengths[selected]
+        fg_ends = fg_starts + fg_lengths
+        gaps = fg_starts - np.concatenate(([0], fg_ends[:-1]))
+        counts = np.column_stack((gaps, fg_lengths)).ravel()
+        if fg_ends[-1] < n:
+            counts = np.append(counts, n - fg_ends[-1])
+        rles[class_index] = {'size': [height, width], 'counts': counts.astype(np.int64)}
+    return rles
+
+def encode(binary_mask):
+    """Encode a single binary (H, W) mask as an RLE."""
+    return encode_labels(np.asarray(binary_mask, dtype=np.uint8), num_classes=1).get(
+        1, {'size': list(binary_mask.shape), 'counts': np.array([binary_mask.size], dtype=np.int64)})
+
+def decode(rle):
+    """Expand an RLE back to a binary (H, W) uint8 mask."""
+    height, width = rle['size']
+    counts = _counts(rle)
+    values = np.arange(len(counts), dtype=np.uint8) % 2
+    return np.repeat(values, counts).reshape((height, width), order='F')
+
+def decode_labels(rles, size):
+    """Rebuild a class-index mask from {class_index: RLE}."""
+    height, width = size
+    labels = np.zeros(height * width, dtype=np.uint8)
+    for class_index, rle in rles.items():
+        starts, ends = _runs(rle)
+        # Mark run boundaries with +1/-1 and integrate to get coverage
+        marks = np.zeros(height * width + 1, dtype=np.int32)
+        np.add.at(marks, starts, 1)
+        np.add.at(marks, ends, -1)
+        labels[np.cumsum(marks[:-1]) > 0] = int(class_index)
+    return labels.reshape((height, width), order='F')
+
+def _counts(rle):
+    counts = rle['counts']
+    if isinstance(counts, (str, bytes)):
+        return np.array(string_to_counts(counts), dtype=np.int64)
+    return np.asarray(counts, dtype=np.int64)
+
+def _runs(rle):
+    """Start and end (exclusive) positions of the foreground runs."""
+    boundaries = np.concatenate(([0], np.cumsum(_counts(rle))))
+    return boundaries[1:-1:2], boundaries[2::2]
+
+def area(rle):
+    """Number of foreground pixels."""
+    return int(_counts(rle)[1::2].sum())
+
+def bbox(rle):
+    """COCO [x, y, width, height] bounding box of the foreground, or None if empty."""
+    height, _ = rle['size']
+    starts, ends = _runs(rle)
+    if starts.size == 0:
+        return None
+    last = ends - 1
+    x0, x1 = starts // height, last // height
+    # Runs that wrap into the next column cover the full column height
+    spans = x0 != x1
+    y_min = 0 if spans.any() else int((starts % height).min())
+    y_max = height - 1 if spans.any() else int((last % height).max())
+    return [int(x0.min()), y_min, int(x1.max() - x0.min() + 1), y_max - y_min + 1]
+
+def _segments(a, b):
+    """Split the pixel range at every run boundary of a and b; return lengths and memberships."""
+    bounds_a = np.concatenate(([0], np.cumsum(_counts(a))))
+    bounds_b = np.concatenate(([0], np.cumsum(_counts(b))))
+    points = np.union1d(bounds_a, bounds_b)
+    lengths = np.diff(points)
+    # A segment is foreground when it falls inside an odd-numbered run
+    in_a = (np.searchsorted(bounds_a, points[:-1], side='right') - 1) % 2 == 1
+    in_b = (np.searchsorted(bounds_b, points[:-1], side='right') - 1) % 2 == 1
+    return lengths, in_a, in_b
+
+def _from_segments(size, lengths, flags):
+    """Build an RLE from segment lengths and foreground flags."""
+    changes = np.flatnonzero(flags[1:] != flags[:-1]) + 1
+    bounds = np.concatenate(([0], changes, [len(flags)]))
+    run_lengths = np.add.reduceat(lengths, bounds[:-1]) if len(flags) else np.array([], dtype=np.int64)
+    if len(flags) and flags[0]:
+        run_lengths = np.concatenate(([0], run_lengths))
+    return {'size': list(size), 'counts': run_lengths.astype(np.int64)}
+
+def intersection(a, b):
+    """RLE of the pixels set in both a and b."""
+    lengths, in_a, in_b = _segments(a, b)
+    return _from_segments(a['size'], lengths, in_a & in_b)
+
+def union(a, b):
+    """RLE of the pixels set in a or b."""
+    lengths, in_a, in_b = _segments(a, b)
+    return _from_segments(a['size'], lengths, in_a | in_b)
+
+def iou(a, b):
+    """Intersection over union computed directly on the runs."""
+    lengths, in_a, in_b = _segments(a, b)
+    union_area = lengths[in_a | in_b].sum()
+    return float(lengths[in_a & in_b].sum() / union_area) if union_area else 0.0
+
+def counts_to_string(counts):
+    """Compress counts into the COCO RLE string format (as in pycocotools)."""
+    chars = []
+    counts = [int(c) for c in counts]
+    for i, x in enumerate(counts):
+        if i > 2:
+            x -= counts[i - 2]
+        more = True
+        while more:
+            c = x & 0x1f
+            x >>= 5
+            more = x != -1 if c & 0x10 else x != 0
+            if more:
+                c |= 0x20
+            chars.append(chr(c + 48))
+    return ''.join(chars)
+
+def string_to_counts(text):
+    """Decompress a COCO RLE string into integer counts."""
+    if isinstance(text, bytes):
+        text = text.decode('ascii')
+    counts = []
+    p = 0
+    while p < len(text):
+        x = 0
+        k = 0
+        more = True
+        while more:
+            c = ord(text[p]) - 48
+            x |= (c & 0x1f) << (5 * k)
+            more = bool(c & 0x20)
+            p += 1
+            k += 1
+            if not more and c & 0x10:
+                x |= -1 << (5 * k)
+        if len(counts) > 2:
+            x += counts[-2]
+        counts.append(x)
+    return counts
+
+def to_coco(rle):
+    """Return a JSON-serializable RLE with compressed string counts."""
+    return {'size': list(rle['size']), 'counts': counts_to_string(_counts(rle))}
+
+def _convert_task(task):
+    patient_id, stem, mask_path = task
+    try:
+        with Image.open(mask_path) as mask:
+            labels = np.asarray(mask)
+    except Exception as e:
+        print(f"Warning: could not read {mask_path}: {e}")
+        return None
+    rles = encode_labels(labels)
+    return {
+        'image_id': stem,
+        'patient_id': patient_id,
+        'size': list(labels.shape),
+        'classes': {str(c): to_coco(rle) for c, rle in rles.items()},
+    }
+
+def convert_masks(root, output_path, index=None, workers=None):
+    """Encode every mask under a local dataset root into a JSON-lines file."""
+    if index is None:
+        index = build_dataset_index(root)
+    tasks = [(patient_id, os.path.splitext(filename)[0], os.path.join(root, patient_id, 'masks', filename))
+             for patient_id in sorted(index)
+             for filename in sorted(index[patient_id]['masks'])]
+
+    written = 0
+    with Pool(processes=workers or os.cpu_count()) as pool, open(output_path, 'w') as out:
+        for record in pool.imap(_convert_task, tasks, chunksize=8):
+            if record is not None:
+                out.write(json.dumps(record) + '\n')
+                written += 1
+    return written
+
+def load_rle_masks(path):
+    """Yield records written by convert_masks, one per mask."""
+    with open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert class masks to COCO-style RLE")
+    parser.add_argument('root', help="Local copy of the SCOPE_HN dataset")
+    parser.add_argument('output', help="Output JSON-lines file (one mask per line)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    written = convert_masks(args.root, args.output, workers=args.workers)
+    size_mb = os.path.getsize(args.output) / (1024 * 1024)
+    print(f"Encoded {written} masks to {args.output} ({size_mb:.2f} MB)")
+
+if __name__ == "__main__":
+    main()
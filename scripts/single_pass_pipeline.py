@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Produce final SCOPE_HN_XXX.mp4 videos in a single ffmpeg pass.
+
+The usual workflow decodes and re-encodes each video three times: audio
+removal, PHI redaction (apply_existing_redaction.py) and trimming
+(web_video_trimmer.py). This script combines all three. It takes the
+redaction regions from the *_phi_coords.json files and the keep-segments
+from trimming_log.csv, and runs one ffmpeg command per source video: audio
+is dropped, the regions are drawn once, and the segments are cut and
+concatenated inside the filter graph. Each video is therefore encoded
+exactly once.
+
+Usage:
+    python single_pass_pipeline.py --video-dir rau_so_seg_videos --trim-log Project/logs/trimming_log.csv
+"""
+
+import argparse
+import csv
+import os
+import subprocess
+import time
+from multiprocessing.pool import ThreadPool
+
+from apply_existing_redaction import (VIDEO_ENCODER_SETTINGS, find_matching_video, load_coordinate_files,
+                                      redaction_filter, threads_per_job)
+
+def load_trimming_log(log_file):
+    """
+    Read keep-segments from trimming_log.csv as {video_name: [(start, end), ...]}.
+
+    A video trimmed more than once keeps only the segments logged most recently.
+    """
+    runs = {}
+    with open(log_file, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            # The log is append-only and each trim writes its rows together starting at
+            # segment 1, so a new run replaces the previous one (timestamps can repeat
+            # within one second)
+            if int(row['segment_number']) == 1 or row['video_name'] not in runs:
+                runs[row['video_name']] = []
+            runs[row['video_name']].append((float(row['start_time']), float(row['end_time'])))
+    return runs
+
+def build_filter_graph(bbox_coords, segments, offset=0.0):
+    """
+    Filter graph that redacts once, then trims and concatenates the segments.
+
+    Segment times are shifted by `offset` (the input seek position).
+    """
+    redact = f"[0:v]{redaction_filter(bbox_coords, offset)}"
+    if len(segments) == 1:
+        start, end = segments[0]
+        return f"{redact},trim=start={start - offset}:end={end - offset},setpts=PTS-STARTPTS[out]"
+
+    labels = [f"[s{i}]" for i in range(len(segments))]
+    parts = [f"{redact},split={len(segments)}{''.join(labels)}"]
+    for i, (start, end) in enumerate(segments):
+        parts.append(f"{labels[i]}trim=start={start - offset}:end={end - offset},setpts=PTS-STARTPTS[v{i}]")
+    parts.append(f"{''.join(f'[v{i}]' for i in range(len(segments)))}concat=n={len(segments)}:v=1:a=0[out]")
+    return ';'.join(parts)
+
+def build_pipeline_command(video_path, output_path, bbox_coords, segments, threads=None):
+    """ffmpeg command for the whole audio-strip + redaction + trim pipeline."""
+    segments = sorted(segments)
+    # Seek the input to the first kept second so the pre-scope part is never decoded
+    offset = segments[0][0]
+    duration = segments[-1][1] - offset
+    cmd = ['ffmpeg', '-y', '-ss', str(offset), '-t', str(duration), '-i', video_path,
+           '-filter_complex', build_filter_graph(bbox_coords, segments, offset),
+           '-map', '[out]', '-an'] + VIDEO_ENCODER_SETTINGS
+    if threads:
+        cmd += ['-threads', str(threads)]
+    cmd.append(output_path)
+    return cmd
+
+def process_video(video_path, output_path, bbox_coords, segments, threads=None):
+    """Run the single-pass pipeline for one video and return a result dict."""
+    result = {
+        'video': os.path.basename(video_path),
+        'output': output_path,
+        'segments': len(segments),
+        'kept_seconds': sum(end - start for start, end in segments),
+        'success': False,
+        'seconds': 0.0,
+        'error': None,
+    }
+    root, ext = os.path.splitext(output_path)
+    temp_path = f"{root}.partial{ext}"
+    start = time.perf_counter()
+    try:
+        cmd = build_pipeline_command(video_path, temp_path, bbox_coords, segments, threads)
+        subprocess.run(cmd, capture_output=True, text=True, check=True)
+        os.replace(temp_path, output_path)
+        result['success'] = True
+    except subprocess.CalledProcessError as e:
+        result['error'] = (e.stderr or str(e)).strip()[-200:]
+    except OSError as e:
+        result['error'] = str(e)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def _pipeline_task(task):
+    return process_video(*task)
+
+def main():
+    parser = argparse.ArgumentParser(description="Strip audio, redact PHI and trim each video in one ffmpeg pass")
+    parser.add_argument('--video-dir', default="rau_so_seg_videos", help="Directory of original videos")
+    parser.add_argument('--coords-dir', default=os.path.join("rau_so_seg_videos_noaudio", "phi_coords"),
+                        help="Directory of *_phi_coords.json files")
+    parser.add_argument('--trim-log', default=os.path.join("Project", "logs", "trimming_log.csv"),
+                        help="trimming_log.csv written by web_video_trimmer.py")
+    parser.add_argument('--output-dir', default=os.path.join("Project", "final_videos"),
+                        help="Directory for the final SCOPE_HN_XXX.mp4 files")
+    parser.add_argument('--jobs', type=int, default=1, help="Concurrent ffmpeg encodes (default: 1)")
+    parser.add_argument('--threads', type=int, default=None,
+                        help="ffmpeg threads per encode (default: CPU cores divided by --jobs)")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    coordinates = load_coordinate_files(args.coords_dir)
+    segments = load_trimming_log(args.trim_log)
+
+    tasks = []
+    missing = []
+    threads = args.threads or (threads_per_job(args.jobs) if args.jobs > 1 else None)
+    for number, coords in sorted(coordinates.items()):
+        video_path = find_matching_video(number, args.video_dir)
+        if video_path is None:
+            missing.append(f"{number} (no video)")
+            continue
+        video_name = os.path.basename(video_path)
+        if not segments.get(video_name):
+            missing.append(f"{video_name} (not trimmed yet)")
+            continue
+        tasks.append((video_path, os.path.join(args.output_dir, video_name), coords,
+                      segments[video_name], threads))
+
+    print(f"\nSingle-pass processing of {len(tasks)} videos with {args.jobs} concurrent job(s)...")
+    if missing:
+        print(f"Skipping {len(missing)}: {', '.join(missing)}")
+    print("-" * 50)
+
+    tasks.sort(key=lambda task: os.path.getsize(task[0]), reverse=True)
+    results = []
+    start = time.perf_counter()
+    with ThreadPool(processes=max(1, args.jobs)) as pool:
+        for result in pool.imap_unordered(_pipeline_task, tasks):
+            results.append(result)
+            if result['success']:
+                print(f"  ✓ {result['video']}: {result['segments']} segment(s), "
+                      f"{result['kept_seconds']:.1f}s kept, encoded in {result['seconds']:.1f}s")
+            else:
+                print(f"  ✗ {result['video']}: {result['error']}")
+    elapsed = time.perf_counter() - start
+
+    print("-" * 50)
+    success_count = sum(1 for r in results if r['success'])
+    print(f"Pipeline complete: {success_count}/{len(tasks)} videos in {elapsed:.1f}s")
+    print(f"Final videos saved to: {args.output_dir}/")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Persistent SQLite index for incremental SCOPE_HN image/mask validation.
+
+The cache records the size and modtime of every image and mask together with
+the pairing result for each patient. On later runs only patients whose
+listing changed are re-checked; everything else is served from the cache.
+"""
+
+import hashlib
+import json
+import sqlite3
+
+from find_image_mask_discrepancy import find_discrepancies_by_patient
+
+DEFAULT_CACHE_PATH = ".scope_hn_validation.sqlite"
+
+# Result fields stored as sorted lists in JSON and restored as sets
+SET_FIELDS = ('image_bases', 'mask_bases', 'images_without_masks', 'masks_without_images', 'matching_pairs')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    patient_id TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    size INTEGER,
+    modtime TEXT,
+    PRIMARY KEY (patient_id, folder, filename)
+);
+CREATE TABLE IF NOT EXISTS patients (
+    patient_id TEXT PRIMARY KEY,
+    signature TEXT NOT NULL,
+    result TEXT NOT NULL
+);
+"""
+
+def open_cache(cache_path=DEFAULT_CACHE_PATH):
+    """Open (and create if needed) the validation cache database."""
+    conn = sqlite3.connect(cache_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+def patient_signature(patient_entry):
+    """Hash a patient's listing (names, sizes, modtimes) to detect changes."""
+    digest = hashlib.sha1()
+    for folder in ('images', 'masks'):
+        for filename, meta in sorted(patient_entry.get(folder, {}).items()):
+            digest.update(f"{folder}/{filename}\0{meta['size']}\0{meta['modtime']}\n".encode())
+    return digest.hexdigest()
+
+def _encode_result(analysis):
+    """Serialize a find_discrepancies_by_patient result to JSON."""
+    encoded = dict(analysis)
+    for field in SET_FIELDS:
+        encoded[field] = sorted(analysis[field])
+    return json.dumps(encoded)
+
+def _decode_result(text):
+    """Restore a cached result in the find_discrepancies_by_patient format."""
+    analysis = json.loads(text)
+    for field in SET_FIELDS:
+        analysis[field] = set(analysis[field])
+    return analysis
+
+def _store_patient(conn, patient_id, patient_entry, signature, analysis):
+    """Replace the cached files and pairing result for one patient."""
+    conn.execute("DELETE FROM files WHERE patient_id = ?", (patient_id,))
+    conn.executemany(
+        "INSERT INTO files (patient_id, folder, filename, size, modtime) VALUES (?, ?, ?, ?, ?)",
+        [(patient_id, folder, filename, meta['size'], str(meta['modtime']))
+         for folder in ('images', 'masks')
+         for filename, meta in patient_entry.get(folder, {}).items()]
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO patients (patient_id, signature, result) VALUES (?, ?, ?)",
+        (patient_id, signature, _encode_result(analysis))
+    )
+
+def cached_discrepancies(index, cache_path=DEFAULT_CACHE_PATH, full=False):
+    """
+    Return per-patient discrepancy results, re-checking only changed patients.
+
+    Returns (results, rechecked) where results maps patient_id to the same
+    dict as find_discrepancies_by_patient and rechecked lists the patients
+    that were analyzed on this run. With full=True the cache is rebuilt.
+    """
+    conn = open_cache(cache_path)
+    try:
+        with conn:
+            if full:
+                conn.execute("DELETE FROM files")
+                conn.execute("DELETE FROM patients")
+            cached = {row[0]: (row[1], row[2]) for row in
+                      conn.execute("SELECT patient_id, signature, result FROM patients")}
+
+            results = {}
+            rechecked = []
+            for patient_id in sorted(index):
+                signature = patient_signature(index[patient_id])
+                if patient_id in cached and cached[patient_id][0] == signature:
+                    results[patient_id] = _decode_result(cached[patient_id][1])
+                    continue
+                analysis = find_discrepancies_by_patient(patient_id, index)
+                _store_patient(conn, patient_id, index[patient_id], signature, analysis)
+                results[patient_id] = analysis
+                rechecked.append(patient_id)
+
+            # Drop patients that disappeared from the listing
+            for patient_id in set(cached) - set(index):
+                conn.execute("DELETE FROM files WHERE patient_id = ?", (patient_id,))
+                conn.execute("DELETE FROM patients WHERE patient_id = ?", (patient_id,))
+    finally:
+        conn.close()
+
+    return results, rechecked
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Verify PHI redaction in the redacted videos.
+
+For each video with a coordinate file, ffmpeg decodes sampled frames as raw
+grayscale and pipes them straight into NumPy (no temporary images). Every
+sampled frame is checked with vectorized max/mean tests that the redaction
+box is black. Bright pixels outside the box that stay in the same place for
+most of the video are reported as a possible static overlay (burned-in
+text or a logo the box does not cover), with the frames that show it.
+Videos are verified concurrently, one ffmpeg process each.
+
+Usage:
+    python verify_redaction.py [--video-dir rau_so_seg_videos_redacted] [--sample-fps 1] [--jobs N]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import time
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+from apply_existing_redaction import find_matching_video, load_coordinate_files, region_active
+
+BOX_MAX_LEVEL = 40     # Brightest pixel allowed inside the box (compression noise on black)
+BOX_MEAN_LEVEL = 24    # Mean level allowed inside the box
+BRIGHT_LEVEL = 200     # Pixels at or above this level are overlay text candidates
+STATIC_FRACTION = 0.9  # Share of sampled frames a bright pixel must appear in to count as static
+MIN_OVERLAY_CELLS = 20 # Minimum static cells (4x4 pixel blocks) to report an overlay
+CELL = 4
+
+def probe_dimensions(video_path):
+    """Width and height of the first video stream."""
+    cmd = ['ffprobe', '-v', 'quiet', '-select_streams', 'v:0',
+           '-show_entries', 'stream=width,height', '-of', 'json', video_path]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    stream = json.loads(result.stdout)['streams'][0]
+    return int(stream['width']), int(stream['height'])
+
+def iter_gray_frames(video_path, width, height, sample_fps=1.0, extra_filter=None):
+    """
+    Yield sampled frames as (height, width) uint8 arrays read from an ffmpeg pipe.
+
+    extra_filter is appended to the fps filter (e.g. a scale to width x height).
+    """
+    video_filter = f'fps={sample_fps}' + (f',{extra_filter}' if extra_filter else '')
+    cmd = ['ffmpeg', '-v', 'error', '-i', video_path, '-an',
+           '-vf', video_filter, '-f', 'rawvideo', '-pix_fmt', 'gray', 'pipe:1']
+    frame_bytes = width * height
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            buffer = process.stdout.read(frame_bytes)
+            if len(buffer) < frame_bytes:
+                break
+            yield np.frombuffer(buffer, dtype=np.uint8).reshape(height, width)
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
+
+def _clip_box(coords, width, height):
+    x0 = max(0, int(coords['x']))
+    y0 = max(0, int(coords['y']))
+    x1 = min(width, int(coords['x'] + coords['width']))
+    y1 = min(height, int(coords['y'] + coords['height']))
+    return x0, y0, x1, y1
+
+def analyze_frames(frames, width, height, coords, sample_fps=1.0):
+    """
+    Check sampled frames against the redaction regions of a video.
+
+    Each region is only checked in frames inside its time window. Returns a
+    dict with the timestamps of frames where a region is not black, the
+    bounding box [x, y, w, h] of any static bright overlay outside the
+    regions, and the timestamps of frames where that overlay is visible.
+    """
+    regions = [(region, _clip_box(region, width, height)) for region in coords.get('regions', [coords])]
+    rows, cols = height // CELL, width // CELL
+    # Cells touching a redaction region are ignored by the overlay test
+    outside = np.ones((rows, cols), dtype=bool)
+    for _, (x0, y0, x1, y1) in regions:
+        outside[y0 // CELL:(y1 + CELL - 1) // CELL, x0 // CELL:(x1 + CELL - 1) // CELL] = False
+
+    box_failures = []
+    box_max = 0
+    bright_counts = np.zeros((rows, cols), dtype=np.uint32)
+    bright_frames = []  # Packed per-frame bright-cell masks, 1 bit per cell
+    count = 0
+    for frame in frames:
+        timestamp = count / sample_fps
+        for region, (x0, y0, x1, y1) in regions:
+            if x1 <= x0 or y1 <= y0 or not region_active(region, timestamp):
+                continue
+            pixels = frame[y0:y1, x0:x1]
+            peak = int(pixels.max())
+            box_max = max(box_max, peak)
+            if peak > BOX_MAX_LEVEL or pixels.mean() > BOX_MEAN_LEVEL:
+                box_failures.append(round(timestamp, 2))
+                break
+        cells = frame[:rows * CELL, :cols * CELL].reshape(rows, CELL, cols, CELL).max(axis=(1, 3))
+        bright = (cells >= BRIGHT_LEVEL) & outside
+        bright_counts += bright
+        bright_frames.append(np.packbits(bright))
+        count += 1
+
+    result = {
+        'frames': count,
+        'box_max': box_max,
+        'box_failures': box_failures,
+        'overlay_bbox': None,
+        'overlay_frames': [],
+    }
+    if count == 0:
+        return result
+
+    static = bright_counts >= STATIC_FRACTION * count
+    if static.sum() >= MIN_OVERLAY_CELLS:
+        ys, xs = np.nonzero(static)
+        result['overlay_bbox'] = [int(xs.min()) * CELL, int(ys.min()) * CELL,
+                                  int(xs.max() - xs.min() + 1) * CELL, int(ys.max() - ys.min() + 1) * CELL]
+        packed_static = np.packbits(static)
+        threshold = static.sum() // 2
+        # A frame shows the overlay when at least half of the static cells are bright in it
+        for i, packed in enumerate(bright_frames):
+            overlap = np.unpackbits(packed & packed_static).sum()
+            if overlap >= threshold:
+                result['overlay_frames'].append(round(i / sample_fps, 2))
+    return result
+
+def verify_video(video_path, coords, sample_fps=1.0):
+    """Verify one redacted video; returns a result dict including 'ok' and any 'error'."""
+    result = {'video': os.path.basename(video_path), 'ok': False, 'error': None, 'seconds': 0.0}
+    start = time.perf_counter()
+    try:
+        width, height = probe_dimensions(video_path)
+        frames = iter_gray_frames(video_path, width, height, sample_fps)
+        result.update(analyze_frames(frames, width, height, coords, sample_fps))
+        result['ok'] = result['frames'] > 0 and not result['box_failures'] and result['overlay_bbox'] is None
+        if result['frames'] == 0:
+            result['error'] = "no frames decoded"
+    except (subprocess.CalledProcessError, OSError, KeyError, IndexError, ValueError) as e:
+        result['error'] = str(e)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def _verify_task(task):
+    return verify_video(*task)
+
+def verify_videos(video_dir, coords_dir, sample_fps=1.0, jobs=None):
+    """Verify every video that has a coordinate file; returns (results, unmatched numbers)."""
+    coordinates = load_coordinate_files(coords_dir)
+    tasks = []
+    unmatched = []
+    for number, coords in sorted(coordinates.items()):
+        video_path = find_matching_video(number, video_dir)
+        if video_path:
+            tasks.append((video_path, coords, sample_fps))
+        else:
+            unmatched.append(number)
+
+    results = []
+    with ThreadPool(processes=jobs or os.cpu_count()) as pool:
+        for result in pool.imap_unordered(_verify_task, tasks):
+            results.append(result)
+            status = "✓" if result['ok'] else "✗"
+            print(f"  {status} {result['video']}: {result.get('frames', 0)} frames checked "
+                  f"in {result['seconds']:.1f}s")
+    return sorted(results, key=lambda r: r['video']), unmatched
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify PHI redaction boxes in redacted videos")
+    parser.add_argument('--video-dir', default="rau_so_seg_videos_redacted", help="Directory of redacted videos")
+    parser.add_argument('--coords-dir', default=os.path.join("rau_so_seg_videos_noaudio", "phi_coords"),
+                        help="Directory of *_phi_coords.json files")
+    parser.add_argument('--sample-fps', type=float, default=1.0, help="Frames per second of video to check")
+    parser.add_argument('--jobs', type=int, default=None, help="Videos verified concurrently (default: CPU count)")
+    parser.add_argument('--output', default=None, help="Write all results to this JSON file")
+    args = parser.parse_args()
+
+    print("Redaction Verification")
+    print("=" * 50)
+    start = time.perf_counter()
+    results, unmatched = verify_videos(args.video_dir, args.coords_dir, args.sample_fps, args.jobs)
+    elapsed = time.perf_counter() - start
+
+    print("-" * 50)
+    passed = sum(1 for r in results if r['ok'])
+    print(f"{passed}/{len(results)} videos passed in {elapsed:.1f}s")
+    if unmatched:
+        print(f"No redacted video for coordinates: {unmatched}")
+    for r in results:
+        if r['ok']:
+            continue
+        print(f"\n{r['video']}:")
+        if r['error']:
+            print(f"  Error: {r['error']}")
+        if r.get('box_failures'):
+            print(f"  Box not black in {len(r['box_failures'])} sampled frame(s) (max level {r['box_max']}), "
+                  f"first at {r['box_failures'][0]}s")
+        if r.get('overlay_bbox'):
+            x, y, w, h = r['overlay_bbox']
+            print(f"  Static bright region outside the box at x={x}, y={y}, w={w}, h={h} "
+                  f"in {len(r['overlay_frames'])} sampled frame(s)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'results': results, 'unmatched': unmatched}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
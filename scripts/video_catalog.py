@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Persistent catalog of video metadata shared by the video scripts.
+
+Each video is probed once with a single
+`ffprobe -show_format -show_streams -of json` call. The summary (duration,
+resolution, frame rate, codec, audio presence, size) is cached in a JSON
+file keyed by path and invalidated when the file's size or mtime changes.
+Directory listings are cached as well and only re-scanned when the
+directory's mtime changes. The catalog is thread-safe, so the web trimmer's
+request handlers and background workers can share one instance.
+
+Usage:
+    python video_catalog.py rau_so_seg_videos_redacted [--workers 8]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import threading
+from multiprocessing.pool import ThreadPool
+
+DEFAULT_CATALOG_PATH = ".scope_hn_video_catalog.json"
+
+def probe_video(video_path):
+    """Probe one video with a single ffprobe call and return its metadata summary."""
+    cmd = ['ffprobe', '-v', 'quiet', '-show_format', '-show_streams', '-of', 'json', video_path]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    probe = json.loads(result.stdout)
+
+    streams = probe.get('streams', [])
+    video = next((s for s in streams if s.get('codec_type') == 'video'), {})
+    fmt = probe.get('format', {})
+    duration = fmt.get('duration') or video.get('duration') or 0
+    return {
+        'duration': float(duration),
+        'width': video.get('width', 'unknown'),
+        'height': video.get('height', 'unknown'),
+        'fps': video.get('r_frame_rate', 'unknown'),
+        'codec': video.get('codec_name', 'unknown'),
+        'frames': int(video['nb_frames']) if video.get('nb_frames', '').isdigit() else None,
+        'has_audio': any(s.get('codec_type') == 'audio' for s in streams),
+        'bit_rate': int(fmt['bit_rate']) if str(fmt.get('bit_rate', '')).isdigit() else None,
+        'size_mb': os.path.getsize(video_path) / (1024*1024),
+    }
+
+class VideoCatalog:
+    """Cached ffprobe metadata and directory listings, keyed by path, size and mtime."""
+
+    def __init__(self, catalog_path=DEFAULT_CATALOG_PATH):
+        self.catalog_path = catalog_path
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._listings = {}
+        self._failed = {}  # path -> (size, mtime) of videos ffprobe could not read
+        if catalog_path and os.path.exists(catalog_path):
+            try:
+                with open(catalog_path, 'r') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: ignoring unreadable video catalog {catalog_path}: {e}")
+
+    def videos(self, directory, pattern_suffix=".mp4"):
+        """Sorted paths of the videos in a directory; re-scanned only when it changes."""
+        try:
+            mtime = os.stat(directory).st_mtime
+        except OSError:
+            return []
+        with self._lock:
+            cached = self._listings.get(directory)
+            if cached is not None and cached[0] == mtime:
+                return list(cached[1])
+        with os.scandir(directory) as entries:
+            paths = sorted(os.path.join(directory, e.name) for e in entries
+                           if e.is_file() and e.name.endswith(pattern_suffix))
+        with self._lock:
+            self._listings[directory] = (mtime, paths)
+        return list(paths)
+
+    def _key(self, video_path):
+        return os.path.abspath(video_path)
+
+    def cached(self, video_path):
+        """Metadata if the cached entry is still valid, else None (never probes)."""
+        try:
+            stat = os.stat(video_path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(self._key(video_path))
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            return entry['info']
+        return None
+
+    def _known_failure(self, video_path):
+        try:
+            stat = os.stat(video_path)
+        except OSError:
+            return False
+        with self._lock:
+            return self._failed.get(self._key(video_path)) == (stat.st_size, stat.st_mtime)
+
+    def get(self, video_path, save=True):
+        """Metadata for a video, probing it only if it is new or changed. None if probing fails."""
+        info = self.cached(video_path)
+        if info is not None:
+            return info
+        try:
+            stat = os.stat(video_path)
+        except OSError as e:
+            print(f"Error getting video info for {video_path}: {e}")
+            return None
+        # Unreadable videos are not re-probed until they change
+        if self._known_failure(video_path):
+            return None
+        try:
+            info = probe_video(video_path)
+        except (subprocess.CalledProcessError, OSError, ValueError, KeyError) as e:
+            print(f"Error getting video info for {video_path}: {e}")
+            with self._lock:
+                self._failed[self._key(video_path)] = (stat.st_size, stat.st_mtime)
+            return None
+        with self._lock:
+            self._entries[self._key(video_path)] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'info': info}
+        if save:
+            self.save()
+        return info
+
+    def refresh(self, video_paths, workers=8):
+        """Probe every new or changed video concurrently; returns {path: info or None}."""
+        infos = {path: self.cached(path) for path in video_paths}
+        stale = [path for path, info in infos.items() if info is None and not self._known_failure(path)]
+        if not stale:
+            return infos
+        with ThreadPool(processes=max(1, min(workers, len(stale)))) as pool:
+            probed = pool.map(lambda path: self.get(path, save=False), stale)
+        infos.update(zip(stale, probed))
+        # Failed probes add no entries, so only save when something was catalogued
+        if any(info is not None for info in probed):
+            self.save()
+        return infos
+
+    def save(self):
+        """Write the catalog atomically."""
+        if not self.catalog_path:
+            return
+        with self._lock:
+            tmp_path = f"{self.catalog_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.catalog_path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Probe and cache metadata for every video in a directory")
+    parser.add_argument('video_dir', help="Directory of .mp4 videos")
+    parser.add_argument('--catalog', default=DEFAULT_CATALOG_PATH, help="Catalog JSON file")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent ffprobe processes")
+    args = parser.parse_args()
+
+    catalog = VideoCatalog(args.catalog)
+    videos = catalog.videos(args.video_dir)
+    infos = catalog.refresh(videos, args.workers)
+    total = sum(info['duration'] for info in infos.values() if info)
+    failed = [os.path.basename(path) for path, info in infos.items() if info is None]
+    print(f"Catalogued {len(videos) - len(failed)} videos ({total / 3600:.2f} h) in {args.catalog}")
+    if failed:
+        print(f"Could not probe: {', '.join(failed)}")
+
+if __name__ == "__main__":
+    main()
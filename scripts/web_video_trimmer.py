@@ -6,16 +6,35 @@ This tool provides a web interface for reviewing videos and specifying
 time ranges to keep (removing pre-scope and post-scope segments).
 """
 
+import argparse
 import os
 import sys
 import json
 import subprocess
 import csv
+import queue
+import re
+import uuid
 from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, unquote
 import tempfile
-import glob
+import threading
+from multiprocessing.pool import ThreadPool
+
+from video_catalog import DEFAULT_CATALOG_PATH, VideoCatalog
+
+MAX_FINISHED_TRIM_JOBS = 200  # Finished trim jobs kept for /api/trim_status
+
+def remove_stale_files(directory, pattern, keep):
+    """Delete files in directory whose names match the regex pattern, except those in keep."""
+    for filename in os.listdir(directory):
+        if filename not in keep and re.match(pattern, filename) and not filename.endswith('.partial.jpg'):
+            try:
+                os.remove(os.path.join(directory, filename))
+            except OSError:
+                pass
 
 class VideoTrimmerHandler(BaseHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
@@ -33,11 +52,39 @@ class VideoTrimmerHandler(BaseHTTPRequestHandler):
             self.serve_video_list(batch_num)
         elif parsed_path.path == '/api/batch_info':
             self.serve_batch_info()
+        elif parsed_path.path == '/api/prefetch_status':
+            batch_num = int(query_params.get('batch', [1])[0])
+            self.send_json_response(self.trimmer.get_prefetch_status(batch_num))
+        elif parsed_path.path == '/api/trim_status':
+            job = self.trimmer.get_trim_job(query_params.get('job', [''])[0])
+            if job:
+                self.send_json_response(job)
+            else:
+                self.send_error(404)
         elif parsed_path.path.startswith('/api/video/'):
             video_name = parsed_path.path.split('/')[-1]
             self.serve_video_info(video_name)
         elif parsed_path.path.startswith('/preview/'):
             self.serve_preview_frame(parsed_path.path[9:])
+        elif parsed_path.path.startswith('/video/'):
+            self.serve_video_file(parsed_path.path[7:])
+        elif parsed_path.path.startswith('/api/filmstrip/'):
+            video_name = os.path.basename(unquote(parsed_path.path))
+            self.send_json_response(self.trimmer.get_filmstrip_status(video_name))
+        elif parsed_path.path.startswith('/filmstrip/'):
+            self.serve_filmstrip(parsed_path.path[11:])
+        else:
+            self.send_error(404)
+    
+    def do_HEAD(self):
+        parsed_path = urlparse(self.path)
+        
+        if parsed_path.path.startswith('/preview/'):
+            self.serve_preview_frame(parsed_path.path[9:], head_only=True)
+        elif parsed_path.path.startswith('/video/'):
+            self.serve_video_file(parsed_path.path[7:], head_only=True)
+        elif parsed_path.path.startswith('/filmstrip/'):
+            self.serve_filmstrip(parsed_path.path[11:], head_only=True)
         else:
             self.send_error(404)
     
@@ -74,6 +121,9 @@ class VideoTrimmerHandler(BaseHTTPRequestHandler):
         .status.error { background: #f8d7da; color: #721c24; }
         .status.info { background: #d1ecf1; color: #0c5460; }
         .hidden { display: none; }
+        .filmstrip-bar { position: relative; height: 24px; background: #dee2e6; border-radius: 3px; cursor: crosshair; margin: 5px 0; }
+        .filmstrip-cursor { position: absolute; top: 0; bottom: 0; width: 2px; background: #dc3545; pointer-events: none; }
+        .filmstrip-thumb { border: 1px solid #ccc; background-repeat: no-repeat; margin: 5px 0; }
     </style>
 </head>
 <body>
@@ -84,7 +134,7 @@ class VideoTrimmerHandler(BaseHTTPRequestHandler):
     
     <div id="batch-controls" class="status info">
         <h3>Batch Processing</h3>
-        <p>Processing videos in batches of 5 for faster loading</p>
+        <p id="batch-size-note">Processing videos in batches</p>
         <div id="batch-navigation"></div>
     </div>
     
@@ -117,6 +167,9 @@ class VideoTrimmerHandler(BaseHTTPRequestHandler):
                 .then(response => response.json())
                 .then(data => {
                     totalBatches = data.total_batches;
+                    batchSize = data.batch_size;
+                    document.getElementById('batch-size-note').textContent =
+                        `Processing ${data.total_videos} videos in batches of ${batchSize}`;
                     renderBatchNavigation();
                     loadVideos(currentBatch);
                 })
@@ -135,6 +188,7 @@ class VideoTrimmerHandler(BaseHTTPRequestHandler):
                     videos = data.videos;
                     renderVideoList();
                     renderBatchNavigation();
+                    pollPrefetchStatus(batchNum);
                 })
                 .catch(error => {
                     showStatus('Error loading videos: ' + error, 'error');
@@ -182,6 +236,7 @@ class VideoTrimmerHandler(BaseHTTPRequestHandler):
                         <strong>Size:</strong> ${video.size_mb.toFixed(1)} MB<br>
                         <strong>Resolution:</strong> ${video.width}x${video.height}
                         ${video.processed ? '<br><strong style="color: green;">✅ Already Processed</strong>' : ''}
+                        <br><small id="warm-${video.name}" style="color: #6c757d;">⏳ preparing previews…</small>
                     </div>
                     <button class="button" onclick="reviewVideo('${video.name}')">Review & Trim</button>
                     <button class="button secondary" onclick="skipVideo('${video.name}')">Skip</button>
@@ -190,6 +245,25 @@ class VideoTrimmerHandler(BaseHTTPRequestHandler):
             });
         }
 
+        function pollPrefetchStatus(batchNum) {
+            // Update the "ready" badges while the server warms this batch in the background
+            fetch(`/api/prefetch_status?batch=${batchNum}`)
+                .then(response => response.json())
+                .then(data => {
+                    Object.entries(data.videos).forEach(([name, state]) => {
+                        const badge = document.getElementById(`warm-${name}`);
+                        if (badge) {
+                            badge.textContent = state === 'warm' ? '⚡ ready' : (state === 'failed' ? '⚠ preview failed' : '⏳ preparing previews…');
+                            badge.style.color = state === 'warm' ? '#28a745' : '#6c757d';
+                        }
+                    });
+                    if (data.warm + data.failed < data.total && currentBatch === batchNum && !currentVideo) {
+                        setTimeout(() => pollPrefetchStatus(batchNum), 2000);
+                    }
+                })
+                .catch(() => {});
+        }
+
         function reviewVideo(videoName) {
             showStatus('Loading video details...', 'info');
             
@@ -205,9 +279,10 @@ class VideoTrimmerHandler(BaseHTTPRequestHandler):
         }
 
         function showVideoReview(video) {
+            segmentCount = 1;
             const container = document.getElementById('video-list');
             container.innerHTML = `
-                <button class="button secondary" onclick="loadVideos(currentBatch)">← Back to Batch ${currentBatch}</button>
+                <button class="button secondary" onclick="currentVideo = null; loadVideos(currentBatch)">← Back to Batch ${currentBatch}</button>
                 
                 <h2>Review: ${video.name}</h2>
                 
@@ -218,10 +293,20 @@ class VideoTrimmerHandler(BaseHTTPRequestHandler):
                     <strong>Codec:</strong> ${video.codec}
                 </div>
 
+                <h3>Video</h3>
+                <video id="player" controls preload="metadata" src="/video/${encodeURIComponent(video.name)}" style="max-width: 100%; max-height: 480px; background: #000;"></video>
+                <div style="margin: 5px 0;">
+                    <button class="button secondary" onclick="markTime('start')">Mark Start at Current Time</button>
+                    <button class="button secondary" onclick="markTime('end')">Mark End at Current Time</button>
+                </div>
+
+                <h3>Timeline</h3>
+                <div id="filmstrip"><small>⏳ Preparing timeline filmstrip…</small></div>
+
                 <h3>Preview Frames</h3>
                 <div class="preview-frames" id="preview-frames">
                     ${video.preview_frames.map(frame => `
-                        <div class="preview-frame">
+                        <div class="preview-frame" style="cursor: pointer;" onclick="seekTo(${frame.timestamp})">
                             <img src="/preview/${frame.filename}" alt="Frame at ${frame.timestamp.toFixed(1)}s">
                             <div style="text-align: center; padding: 5px;">
                                 <small>${frame.timestamp.toFixed(1)}s</small>
@@ -253,10 +338,69 @@ class VideoTrimmerHandler(BaseHTTPRequestHandler):
                     <button class="button secondary" onclick="skipVideo('${video.name}')">Skip This Video</button>
                 </div>
             `;
+            loadFilmstrip(video.name);
+        }
+
+        function loadFilmstrip(videoName) {
+            fetch(`/api/filmstrip/${encodeURIComponent(videoName)}`)
+                .then(response => response.json())
+                .then(strip => {
+                    if (!currentVideo || currentVideo.name !== videoName) return;
+                    const container = document.getElementById('filmstrip');
+                    if (strip.ready) {
+                        renderFilmstrip(strip);
+                    } else if (strip.failed) {
+                        container.innerHTML = '<small>Timeline filmstrip unavailable for this video</small>';
+                    } else {
+                        setTimeout(() => loadFilmstrip(videoName), 2000);
+                    }
+                })
+                .catch(() => {});
+        }
+
+        function renderFilmstrip(strip) {
+            // Hover over the bar to scrub through the sprite sheet; click to seek the player
+            const container = document.getElementById('filmstrip');
+            container.innerHTML = `
+                <div class="filmstrip-thumb" id="filmstrip-thumb" style="width: ${strip.tile_width}px; height: ${strip.tile_height}px; background-image: url('/filmstrip/${strip.sprite}');"></div>
+                <small id="filmstrip-time">0.0s</small>
+                <div class="filmstrip-bar" id="filmstrip-bar"><div class="filmstrip-cursor" id="filmstrip-cursor"></div></div>
+            `;
+            const bar = document.getElementById('filmstrip-bar');
+            const timeAt = event => {
+                const rect = bar.getBoundingClientRect();
+                return Math.min(1, Math.max(0, (event.clientX - rect.left) / rect.width)) * currentVideo.duration;
+            };
+            bar.addEventListener('mousemove', event => {
+                const seconds = timeAt(event);
+                const index = Math.min(strip.timestamps.length - 1, Math.floor(seconds / strip.interval));
+                const col = index % strip.columns;
+                const row = Math.floor(index / strip.columns);
+                document.getElementById('filmstrip-thumb').style.backgroundPosition = `-${col * strip.tile_width}px -${row * strip.tile_height}px`;
+                document.getElementById('filmstrip-time').textContent = `${seconds.toFixed(1)}s`;
+                document.getElementById('filmstrip-cursor').style.left = `${100 * seconds / currentVideo.duration}%`;
+            });
+            bar.addEventListener('click', event => seekTo(timeAt(event)));
         }
 
         let segmentCount = 1;
 
+        function seekTo(seconds) {
+            const player = document.getElementById('player');
+            if (player) {
+                player.currentTime = seconds;
+            }
+        }
+
+        function markTime(which) {
+            // Fill the start or end of the last segment with the player's position
+            const player = document.getElementById('player');
+            const input = document.getElementById(`${which}${segmentCount}`);
+            if (player && input) {
+                input.value = player.currentTime.toFixed(1);
+            }
+        }
+
         function addSegment() {
             segmentCount++;
             const segmentsDiv = document.getElementById('segments');
@@ -333,10 +477,7 @@ class VideoTrimmerHandler(BaseHTTPRequestHandler):
             .then(response => response.json())
             .then(data => {
                 if (data.success) {
-                    showStatus(`Successfully trimmed ${currentVideo.name}!`, 'success');
-                    setTimeout(() => {
-                        loadVideos(currentBatch);
-                    }, 2000);
+                    pollTrimJob(data.job_id, currentVideo.name);
                 } else {
                     showStatus('Error trimming video: ' + data.error, 'error');
                 }
@@ -346,6 +487,31 @@ class VideoTrimmerHandler(BaseHTTPRequestHandler):
             });
         }
 
+        function pollTrimJob(jobId, videoName) {
+            fetch(`/api/trim_status?job=${jobId}`)
+                .then(response => response.json())
+                .then(job => {
+                    if (job.status === 'done') {
+                        showStatus(`Successfully trimmed ${videoName}!`, 'success');
+                        setTimeout(() => {
+                            loadVideos(currentBatch);
+                        }, 2000);
+                    } else if (job.status === 'failed') {
+                        showStatus(`Error trimming ${videoName}: ${job.error}`, 'error');
+                    } else if (job.status === 'superseded') {
+                        // A newer trim of this video replaced this one and is polled instead
+                        return;
+                    } else {
+                        const position = job.status === 'queued' ? ` (queued, ${job.ahead} ahead)` : '';
+                        showStatus(`Trimming ${videoName}${position}... This may take a few minutes.`, 'info');
+                        setTimeout(() => pollTrimJob(jobId, videoName), 2000);
+                    }
+                })
+                .catch(error => {
+                    showStatus('Error checking trim status: ' + error, 'error');
+                });
+        }
+
         function skipVideo(videoName) {
             if (confirm(`Skip trimming for ${videoName}?`)) {
                 showStatus(`Skipped ${videoName}`, 'info');
@@ -380,16 +546,109 @@ class VideoTrimmerHandler(BaseHTTPRequestHandler):
         else:
             self.send_error(404)
     
-    def serve_preview_frame(self, filename):
-        preview_path = os.path.join(self.trimmer.preview_dir, filename)
-        if os.path.exists(preview_path):
-            self.send_response(200)
-            self.send_header('Content-type', 'image/jpeg')
-            self.end_headers()
-            with open(preview_path, 'rb') as f:
-                self.wfile.write(f.read())
-        else:
+    def serve_preview_frame(self, filename, head_only=False):
+        preview_path = os.path.join(self.trimmer.preview_dir, os.path.basename(unquote(filename)))
+        self.serve_file(preview_path, 'image/jpeg', head_only)
+    
+    def serve_filmstrip(self, filename, head_only=False):
+        filmstrip_path = os.path.join(self.trimmer.filmstrip_dir, os.path.basename(unquote(filename)))
+        self.serve_file(filmstrip_path, 'image/jpeg', head_only)
+    
+    def serve_video_file(self, video_name, head_only=False):
+        video_path = os.path.join(self.trimmer.input_dir, os.path.basename(unquote(video_name)))
+        if not video_path.endswith('.mp4'):
             self.send_error(404)
+            return
+        self.serve_file(video_path, 'video/mp4', head_only)
+    
+    def _byte_range(self, size, etag, last_modified):
+        """(start, end) of a satisfiable single Range request, None for the whole file, or 'invalid'."""
+        header = self.headers.get('Range')
+        if not header or not header.startswith('bytes=') or ',' in header:
+            return None
+        # A stale If-Range validator means the client must get the whole (changed) file
+        if_range = self.headers.get('If-Range')
+        if if_range and if_range not in (etag, last_modified):
+            return None
+        first, _, last = header[6:].strip().partition('-')
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else size - 1
+            else:
+                start = max(0, size - int(last))
+                end = size - 1
+        except ValueError:
+            return None
+        if start >= size:
+            return 'invalid'
+        # RFC 9110: a range whose last position precedes its first is invalid and ignored
+        if end < start:
+            return None
+        return start, min(end, size - 1)
+    
+    def _not_modified(self, stat, etag):
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return int(stat.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+    
+    def serve_file(self, path, content_type, head_only=False):
+        """
+        Serve a file with Range (206), ETag and Last-Modified support.
+        
+        The body goes from the file to the socket with socket.sendfile
+        (os.sendfile where available), so it is never read into memory.
+        """
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self.send_error(404)
+            return
+        with f:
+            stat = os.fstat(f.fileno())
+            etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+            last_modified = formatdate(stat.st_mtime, usegmt=True)
+            
+            if self._not_modified(stat, etag):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', last_modified)
+                self.end_headers()
+                return
+            
+            byte_range = self._byte_range(stat.st_size, etag, last_modified)
+            if byte_range == 'invalid':
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{stat.st_size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            
+            start, end = byte_range or (0, stat.st_size - 1)
+            self.send_response(206 if byte_range else 200)
+            self.send_header('Content-type', content_type)
+            self.send_header('Content-Length', str(end - start + 1))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            self.send_header('Cache-Control', 'no-cache')
+            if byte_range:
+                self.send_header('Content-Range', f'bytes {start}-{end}/{stat.st_size}')
+            self.end_headers()
+            if head_only or end < start:
+                return
+            try:
+                self.connection.sendfile(f, offset=start, count=end - start + 1)
+            except (BrokenPipeError, ConnectionResetError):
+                # The browser dropped a range it no longer needs (e.g. after a seek)
+                pass
     
     def handle_trim_request(self):
         content_length = int(self.headers['Content-Length'])
@@ -400,13 +659,12 @@ class VideoTrimmerHandler(BaseHTTPRequestHandler):
             video_name = data['video_name']
             segments = data['segments']
             
-            success = self.trimmer.trim_video(video_name, segments)
+            # Trims run in the background; the client polls /api/trim_status with the job id
+            job = self.trimmer.submit_trim(video_name, segments)
+            self.send_json_response({'success': True, 'job_id': job['id'], 'status': job['status']})
             
-            if success:
-                self.send_json_response({'success': True})
-            else:
-                self.send_json_response({'success': False, 'error': 'Trimming failed'})
-                
+        except queue.Full:
+            self.send_json_response({'success': False, 'error': 'Trim queue is full, try again shortly'})
         except Exception as e:
             self.send_json_response({'success': False, 'error': str(e)})
     
@@ -417,17 +675,50 @@ class VideoTrimmerHandler(BaseHTTPRequestHandler):
         self.wfile.write(json.dumps(data).encode())
 
 class WebVideoTrimmer:
-    def __init__(self, input_dir="rau_so_seg_videos_redacted", output_base="Project"):
+    def __init__(self, input_dir="rau_so_seg_videos_redacted", output_base="Project", batch_size=5,
+                 catalog_path=DEFAULT_CATALOG_PATH, prefetch_workers=4, preview_width=480,
+                 trim_workers=1, max_queued_trims=16, filmstrip_frames=60, filmstrip_columns=10,
+                 filmstrip_width=160):
         self.input_dir = input_dir
         self.output_base = output_base
+        self.batch_size = batch_size
+        self.preview_width = preview_width  # Thumbnail width in pixels (0 = full resolution)
+        self.filmstrip_frames = filmstrip_frames
+        self.filmstrip_columns = filmstrip_columns
+        self.filmstrip_width = filmstrip_width
+        # Shared ffprobe cache: each video is probed once, not on every request
+        self.catalog = VideoCatalog(catalog_path)
+        
+        # Background warming of video details (metadata + preview frames)
+        self._details = {}
+        self._pending = {}
+        self._failed = set()
+        self._filmstrip_pending = {}
+        self._filmstrip_failed = {}  # video name -> mtime of the version that failed
+        self._details_lock = threading.Lock()
+        self._prefetch_pool = ThreadPool(processes=prefetch_workers) if prefetch_workers else None
+        
+        # Bounded queue of trim jobs, run by background workers
+        self._trim_jobs = {}
+        self._trimming_videos = set()
+        self._deferred_trims = {}  # video name -> job ids waiting for that video's running trim
+        self._trim_queue = queue.Queue(maxsize=max_queued_trims)
+        self._jobs_lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self._trim_workers = [threading.Thread(target=self._trim_worker, daemon=True)
+                              for _ in range(max(1, trim_workers))]
+        for worker in self._trim_workers:
+            worker.start()
         self.output_dir = os.path.join(output_base, "trimmed_videos")
         self.preview_dir = os.path.join(output_base, "preview_frames")
+        self.filmstrip_dir = os.path.join(output_base, "filmstrips")
         self.logs_dir = os.path.join(output_base, "logs")
         self.log_file = os.path.join(self.logs_dir, "trimming_log.csv")
         
         # Create directories
         os.makedirs(self.output_dir, exist_ok=True)
         os.makedirs(self.preview_dir, exist_ok=True)
+        os.makedirs(self.filmstrip_dir, exist_ok=True)
         os.makedirs(self.logs_dir, exist_ok=True)
         
         # Initialize log file
@@ -441,85 +732,196 @@ class WebVideoTrimmer:
                 writer.writerow(['timestamp', 'video_name', 'segment_number', 'start_time', 'end_time', 'duration'])
     
     def get_video_info(self, video_path):
-        """Get video information using ffprobe."""
-        try:
-            # Get duration
-            cmd_duration = [
-                'ffprobe', '-v', 'quiet', '-show_entries', 'format=duration',
-                '-of', 'csv=p=0', video_path
-            ]
-            duration_result = subprocess.run(cmd_duration, capture_output=True, text=True, check=True)
-            duration = float(duration_result.stdout.strip())
-            
-            # Get video info
-            cmd_info = [
-                'ffprobe', '-v', 'quiet', '-show_entries', 
-                'stream=width,height,r_frame_rate,codec_name',
-                '-select_streams', 'v:0', '-of', 'csv=p=0', video_path
-            ]
-            info_result = subprocess.run(cmd_info, capture_output=True, text=True, check=True)
-            info_parts = info_result.stdout.strip().split(',')
-            
-            width = info_parts[0] if len(info_parts) > 0 else 'unknown'
-            height = info_parts[1] if len(info_parts) > 1 else 'unknown'
-            fps = info_parts[2] if len(info_parts) > 2 else 'unknown'
-            codec = info_parts[3] if len(info_parts) > 3 else 'unknown'
-            
-            return {
-                'duration': duration,
-                'width': width,
-                'height': height,
-                'fps': fps,
-                'codec': codec,
-                'size_mb': os.path.getsize(video_path) / (1024*1024)
-            }
-            
-        except Exception as e:
-            print(f"Error getting video info: {e}")
-            return None
+        """Get video information from the catalog (one cached ffprobe call per video)."""
+        return self.catalog.get(video_path)
     
     def create_preview_frames(self, video_path, video_name, num_frames=6):
-        """Create preview frames for a video."""
+        """
+        Create preview frames for a video, reusing ones already on disk.
+        
+        Frame files are named after the video's mtime, the thumbnail width and
+        the timestamp, so a changed video or size gets new frames. Missing frames
+        are extracted by one ffmpeg process that seeks each input (-ss before -i)
+        straight to its timestamp instead of decoding from the start.
+        """
         try:
             video_info = self.get_video_info(video_path)
             if not video_info:
                 return []
             
             duration = video_info['duration']
+            mtime = int(os.path.getmtime(video_path))
+            stem = os.path.splitext(video_name)[0]
             preview_frames = []
+            missing = []
             
             # Create frames at different intervals
             for i in range(num_frames):
                 timestamp = (duration / (num_frames + 1)) * (i + 1)
-                frame_filename = f"{video_name.replace('.mp4', '')}_frame_{i+1:02d}_{timestamp:.1f}s.jpg"
+                frame_filename = f"{stem}_{mtime}_w{self.preview_width}_frame_{i+1:02d}_{timestamp:.1f}s.jpg"
                 frame_path = os.path.join(self.preview_dir, frame_filename)
-                
-                cmd = [
-                    'ffmpeg', '-y', '-i', video_path,
-                    '-ss', str(timestamp),
-                    '-vframes', '1',
-                    '-q:v', '2',
-                    frame_path
-                ]
+                preview_frames.append({
+                    'filename': frame_filename,
+                    'timestamp': timestamp
+                })
+                if not os.path.exists(frame_path):
+                    missing.append((timestamp, frame_path))
+            
+            if missing:
+                # Write to unique temporary names and rename on success, so an interrupted
+                # or concurrent run never leaves a truncated frame under a cached name
+                token = uuid.uuid4().hex[:8]
+                temp_paths = [frame_path.replace('.jpg', f'.{token}.partial.jpg') for _, frame_path in missing]
+                cmd = ['ffmpeg', '-y', '-v', 'error']
+                for timestamp, _ in missing:
+                    cmd += ['-ss', f"{timestamp:.3f}", '-i', video_path]
+                for index, temp_path in enumerate(temp_paths):
+                    cmd += ['-map', f'{index}:v:0', '-frames:v', '1', '-q:v', '2']
+                    if self.preview_width:
+                        cmd += ['-vf', f'scale={self.preview_width}:-2']
+                    cmd.append(temp_path)
                 
                 result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode == 0:
-                    preview_frames.append({
-                        'filename': frame_filename,
-                        'timestamp': timestamp
-                    })
+                for temp_path, (_, frame_path) in zip(temp_paths, missing):
+                    if result.returncode == 0 and os.path.exists(temp_path):
+                        os.replace(temp_path, frame_path)
+                    elif os.path.exists(temp_path):
+                        os.remove(temp_path)
+                if result.returncode != 0:
+                    print(f"Error creating preview frames for {video_name}: {result.stderr.strip()[-200:]}")
+                
+                # Frames of an older version of the video or another width are never served again
+                keep = {frame['filename'] for frame in preview_frames}
+                remove_stale_files(self.preview_dir, re.escape(stem) + r'_\d+_w\d+_frame_', keep)
             
-            return preview_frames
+            return [frame for frame in preview_frames
+                    if os.path.exists(os.path.join(self.preview_dir, frame['filename']))]
             
         except Exception as e:
             print(f"Error creating preview frames: {e}")
             return []
     
+    def _filmstrip_paths(self, video_path, video_name):
+        stem = f"{os.path.splitext(video_name)[0]}_{int(os.path.getmtime(video_path))}_strip"
+        return os.path.join(self.filmstrip_dir, f"{stem}.jpg"), os.path.join(self.filmstrip_dir, f"{stem}.json")
+    
+    def get_filmstrip(self, video_name):
+        """Timestamp index of the video's current sprite sheet, or None if it has not been made yet."""
+        video_path = os.path.join(self.input_dir, video_name)
+        try:
+            _, index_path = self._filmstrip_paths(video_path, video_name)
+            with open(index_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def create_filmstrip(self, video_path, video_name):
+        """
+        Create a sprite sheet of evenly spaced thumbnails and its JSON timestamp index.
+        
+        One ffmpeg pass samples the video (fps), shrinks each frame (scale) and
+        lays them out in a grid (tile), so the whole timeline is a single image.
+        """
+        index = self.get_filmstrip(video_name)
+        if index is not None:
+            return index
+        
+        video_info = self.get_video_info(video_path)
+        if not video_info or not video_info['duration'] or not isinstance(video_info['width'], int):
+            return None
+        
+        duration = video_info['duration']
+        frames = self.filmstrip_frames
+        columns = min(self.filmstrip_columns, frames)
+        rows = (frames + columns - 1) // columns
+        interval = duration / frames
+        tile_width = self.filmstrip_width
+        tile_height = max(2, round(tile_width * video_info['height'] / video_info['width'] / 2) * 2)
+        sprite_path, index_path = self._filmstrip_paths(video_path, video_name)
+        temp_path = sprite_path.replace('.jpg', f'.{uuid.uuid4().hex[:8]}.partial.jpg')
+        
+        cmd = [
+            'ffmpeg', '-y', '-v', 'error', '-i', video_path, '-an',
+            '-vf', f'fps={frames}/{duration:.3f},scale={tile_width}:{tile_height},tile={columns}x{rows}',
+            '-frames:v', '1', '-q:v', '4',
+            temp_path
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0 or not os.path.exists(temp_path):
+            print(f"Error creating filmstrip for {video_name}: {result.stderr.strip()[-200:]}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+        os.replace(temp_path, sprite_path)
+        
+        index = {
+            'video': video_name,
+            'sprite': os.path.basename(sprite_path),
+            'columns': columns,
+            'rows': rows,
+            'tile_width': tile_width,
+            'tile_height': tile_height,
+            'interval': interval,
+            'timestamps': [round(i * interval, 2) for i in range(frames)],
+        }
+        with open(index_path + '.tmp', 'w') as f:
+            json.dump(index, f)
+        os.replace(index_path + '.tmp', index_path)
+        
+        # Filmstrips of older versions of the video are never served again
+        remove_stale_files(self.filmstrip_dir, re.escape(os.path.splitext(video_name)[0]) + r'_\d+_strip\.',
+                           {os.path.basename(sprite_path), os.path.basename(index_path)})
+        return index
+    
+    def _filmstrip_failed_recently(self, video_name):
+        """True if the filmstrip failed for the current version of the video (lock held by caller)."""
+        if video_name not in self._filmstrip_failed:
+            return False
+        try:
+            mtime = os.path.getmtime(os.path.join(self.input_dir, video_name))
+        except OSError:
+            return True
+        if self._filmstrip_failed[video_name] == mtime:
+            return True
+        # The video changed since the failure (e.g. it was still being copied), so try again
+        del self._filmstrip_failed[video_name]
+        return False
+    
+    def _warm_filmstrip(self, video_name):
+        video_path = os.path.join(self.input_dir, video_name)
+        try:
+            mtime = os.path.getmtime(video_path)
+            if self.create_filmstrip(video_path, video_name) is None:
+                with self._details_lock:
+                    self._filmstrip_failed[video_name] = mtime
+        except OSError:
+            pass
+        finally:
+            with self._details_lock:
+                self._filmstrip_pending.pop(video_name, None)
+    
+    def get_filmstrip_status(self, video_name):
+        """Filmstrip index with 'ready': True, or 'ready': False (queueing it if it is cold)."""
+        if not os.path.isfile(os.path.join(self.input_dir, video_name)):
+            return {'ready': False, 'failed': True}
+        index = self.get_filmstrip(video_name)
+        if index is not None:
+            return dict(index, ready=True)
+        if self._prefetch_pool is None:
+            index = self.create_filmstrip(os.path.join(self.input_dir, video_name), video_name)
+            return dict(index, ready=True) if index else {'ready': False, 'failed': True}
+        with self._details_lock:
+            failed = self._filmstrip_failed_recently(video_name)
+        if not failed:
+            self.prefetch_videos([os.path.join(self.input_dir, video_name)], details=False)
+        return {'ready': False, 'failed': failed}
+    
     def get_batch_info(self):
         """Get batch information."""
-        video_files = sorted(glob.glob(os.path.join(self.input_dir, "*.mp4")))
+        video_files = self.catalog.videos(self.input_dir)
         total_videos = len(video_files)
-        batch_size = 5
+        # A batch size of 0 shows every video in one batch
+        batch_size = self.batch_size or max(1, total_videos)
         total_batches = (total_videos + batch_size - 1) // batch_size
         
         return {
@@ -528,18 +930,25 @@ class WebVideoTrimmer:
             'total_batches': total_batches
         }
     
-    def get_video_batch(self, batch_num=1, batch_size=5):
+    def get_video_batch(self, batch_num=1, batch_size=None):
         """Get a specific batch of videos."""
-        video_files = sorted(glob.glob(os.path.join(self.input_dir, "*.mp4")))
+        video_files = self.catalog.videos(self.input_dir)
+        batch_size = batch_size or self.batch_size or max(1, len(video_files))
         
         start_idx = (batch_num - 1) * batch_size
         end_idx = start_idx + batch_size
         batch_files = video_files[start_idx:end_idx]
         
+        # Probe any uncatalogued videos of the batch concurrently
+        infos = self.catalog.refresh(batch_files)
+        
+        # Warm this batch and the next one while the reviewer works
+        self.prefetch_videos(batch_files + video_files[end_idx:end_idx + batch_size])
+        
         videos = []
         for video_path in batch_files:
             video_name = os.path.basename(video_path)
-            video_info = self.get_video_info(video_path)
+            video_info = infos[video_path]
             
             # Check if already processed
             output_path = os.path.join(self.output_dir, f"trimmed_{video_name}")
@@ -564,21 +973,106 @@ class WebVideoTrimmer:
             'total_videos': batch_info['total_videos']
         }
     
-    def get_video_details(self, video_name):
+    def prefetch_videos(self, video_paths, details=True):
+        """
+        Queue background preparation of get_video_details and filmstrips for videos that are still cold.
+        
+        Details of every video are queued before any filmstrip, so the quick
+        previews are ready first.
+        """
+        if self._prefetch_pool is None:
+            return
+        with self._details_lock:
+            for video_path in video_paths if details else []:
+                video_name = os.path.basename(video_path)
+                if video_name in self._pending or self._cached_details(video_name) is not None:
+                    continue
+                self._pending[video_name] = self._prefetch_pool.apply_async(self._warm_video, (video_name,))
+            for video_path in video_paths:
+                video_name = os.path.basename(video_path)
+                if video_name in self._filmstrip_pending or self._filmstrip_failed_recently(video_name):
+                    continue
+                if self.get_filmstrip(video_name) is not None:
+                    continue
+                self._filmstrip_pending[video_name] = self._prefetch_pool.apply_async(
+                    self._warm_filmstrip, (video_name,))
+    
+    def _warm_video(self, video_name):
+        try:
+            self.get_video_details(video_name, wait=False)
+        finally:
+            with self._details_lock:
+                self._pending.pop(video_name, None)
+    
+    def _cached_details(self, video_name):
+        """Cached details if the video has not changed since they were built (lock held by caller)."""
+        cached = self._details.get(video_name)
+        if cached is None:
+            return None
+        try:
+            mtime = os.path.getmtime(os.path.join(self.input_dir, video_name))
+        except OSError:
+            return None
+        return cached[1] if cached[0] == mtime else None
+    
+    def get_prefetch_status(self, batch_num=1):
+        """Warm/cold state of every video in a batch."""
+        video_files = self.catalog.videos(self.input_dir)
+        batch_size = self.batch_size or max(1, len(video_files))
+        batch_files = video_files[(batch_num - 1) * batch_size:batch_num * batch_size]
+        states = {}
+        with self._details_lock:
+            for video_path in batch_files:
+                video_name = os.path.basename(video_path)
+                if self._cached_details(video_name) is not None:
+                    states[video_name] = 'warm'
+                elif video_name in self._pending:
+                    states[video_name] = 'warming'
+                elif video_name in self._failed:
+                    states[video_name] = 'failed'
+                else:
+                    states[video_name] = 'cold'
+        values = list(states.values())
+        return {
+            'batch_num': batch_num,
+            'videos': states,
+            'warm': values.count('warm'),
+            'failed': values.count('failed'),
+            'total': len(values),
+        }
+    
+    def get_video_details(self, video_name, wait=True):
         """Get detailed info for a specific video including preview frames."""
         video_path = os.path.join(self.input_dir, video_name)
         
         if not os.path.exists(video_path):
             return None
         
+        with self._details_lock:
+            details = self._cached_details(video_name)
+            pending = self._pending.get(video_name)
+        if details is not None:
+            return details
+        if pending is not None and wait:
+            # Already being prepared in the background; wait instead of running ffmpeg twice
+            pending.wait()
+            with self._details_lock:
+                details = self._cached_details(video_name)
+            if details is not None:
+                return details
+        
+        mtime = os.path.getmtime(video_path)
+        
         video_info = self.get_video_info(video_path)
         if not video_info:
+            with self._details_lock:
+                self._failed.add(video_name)
             return None
         
         # Create preview frames if they don't exist
         preview_frames = self.create_preview_frames(video_path, video_name)
         
-        return {
+        details = {
             'name': video_name,
             'duration': video_info['duration'],
             'size_mb': video_info['size_mb'],
@@ -588,13 +1082,135 @@ class WebVideoTrimmer:
             'codec': video_info['codec'],
             'preview_frames': preview_frames
         }
+        with self._details_lock:
+            if preview_frames:
+                self._details[video_name] = (mtime, details)
+                self._failed.discard(video_name)
+            else:
+                self._failed.add(video_name)
+        return details
+    
+    def submit_trim(self, video_name, segments):
+        """
+        Queue a trim and return its job dict without waiting for it.
+        
+        Resubmitting the segments of a queued or running job returns that job.
+        New segments for a video replace its queued job ('superseded') and run
+        after its running one. Raises queue.Full when the queue is at capacity.
+        """
+        if not os.path.isfile(os.path.join(self.input_dir, video_name)):
+            raise ValueError(f"Unknown video: {video_name}")
+        with self._jobs_lock:
+            active = [job for job in self._trim_jobs.values()
+                      if job['video_name'] == video_name and job['status'] in ('queued', 'running')]
+            for job in active:
+                if job['segments'] == segments:
+                    return dict(job)
+            # Jobs are only queued under this lock, so a free slot stays free until put_nowait below
+            if self._trim_queue.full():
+                raise queue.Full
+            for job in active:
+                if job['status'] == 'queued':
+                    job['status'] = 'superseded'
+                    job['finished'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            job = {
+                'id': uuid.uuid4().hex,
+                'video_name': video_name,
+                'segments': segments,
+                'status': 'queued',
+                'error': None,
+                'submitted': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'finished': None,
+            }
+            self._trim_queue.put_nowait(job['id'])
+            self._trim_jobs[job['id']] = job
+            return dict(job)
+    
+    def get_trim_job(self, job_id):
+        """Current state of a trim job (with 'ahead': queued jobs before it), or None."""
+        with self._jobs_lock:
+            job = self._trim_jobs.get(job_id)
+            if job is None:
+                return None
+            ahead = 0
+            # Jobs are kept in submission order
+            for other in self._trim_jobs.values():
+                if other is job:
+                    break
+                ahead += other['status'] == 'queued'
+            job = dict(job, ahead=ahead)
+        return job
+    
+    def _trim_worker(self):
+        while True:
+            job_id = self._trim_queue.get()
+            if job_id is None:
+                return
+            with self._jobs_lock:
+                job = self._trim_jobs.get(job_id)
+                if job is None or job['status'] == 'superseded':
+                    continue
+                video_name = job['video_name']
+                if video_name in self._trimming_videos:
+                    # Another worker is trimming this video and runs this job next,
+                    # so this worker stays free for other videos
+                    self._deferred_trims.setdefault(video_name, []).append(job_id)
+                    continue
+                self._trimming_videos.add(video_name)
+            while job is not None:
+                self._run_trim_job(job)
+                job = self._next_deferred_trim(video_name)
+    
+    def _next_deferred_trim(self, video_name):
+        """Next queued job deferred for a video, or None (then the video is released)."""
+        with self._jobs_lock:
+            deferred = self._deferred_trims.get(video_name, [])
+            while deferred:
+                job = self._trim_jobs.get(deferred.pop(0))
+                if job is not None and job['status'] == 'queued':
+                    return job
+            self._deferred_trims.pop(video_name, None)
+            self._trimming_videos.discard(video_name)
+            return None
+    
+    def _run_trim_job(self, job):
+        with self._jobs_lock:
+            if job['status'] == 'superseded':
+                return
+            job['status'] = 'running'
+        success = self.trim_video(job['video_name'], job['segments'])
+        with self._jobs_lock:
+            job['status'] = 'done' if success else 'failed'
+            job['error'] = None if success else 'Trimming failed'
+            job['finished'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self._prune_trim_jobs()
+    
+    def _prune_trim_jobs(self):
+        """Forget the oldest finished jobs beyond MAX_FINISHED_TRIM_JOBS (jobs lock held by caller)."""
+        finished = [job_id for job_id, job in self._trim_jobs.items() if job['finished']]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_TRIM_JOBS)]:
+            del self._trim_jobs[job_id]
+    
+    def close(self):
+        """Stop the background prefetch and trim workers (running trims are finished first)."""
+        if self._prefetch_pool is not None:
+            self._prefetch_pool.terminate()
+            self._prefetch_pool.join()
+            self._prefetch_pool = None
+        for _ in self._trim_workers:
+            self._trim_queue.put(None)
+        for worker in self._trim_workers:
+            worker.join()
     
     def trim_video(self, video_name, segments):
         """Trim a video based on specified segments."""
+        video_path = os.path.join(self.input_dir, video_name)
+        output_path = os.path.join(self.output_dir, f"trimmed_{video_name}")
+        # Written beside the output and renamed on success, so a half-written or
+        # failed trim never shows up as processed
+        root, ext = os.path.splitext(output_path)
+        partial_path = f"{root}.partial{ext}"
         try:
-            video_path = os.path.join(self.input_dir, video_name)
-            output_path = os.path.join(self.output_dir, f"trimmed_{video_name}")
-            
             if not segments:
                 print("No segments to trim")
                 return False
@@ -629,7 +1245,7 @@ class WebVideoTrimmer:
                 # Concatenate segments
                 if len(segment_files) == 1:
                     # Single segment, just copy
-                    cmd = ['cp', segment_files[0], output_path]
+                    cmd = ['cp', segment_files[0], partial_path]
                     result = subprocess.run(cmd, capture_output=True, text=True)
                 else:
                     # Multiple segments, concatenate
@@ -642,12 +1258,13 @@ class WebVideoTrimmer:
                         'ffmpeg', '-y', '-f', 'concat', '-safe', '0',
                         '-i', concat_file,
                         '-c', 'copy',
-                        output_path
+                        partial_path
                     ]
                     
                     result = subprocess.run(cmd, capture_output=True, text=True)
                 
                 if result.returncode == 0:
+                    os.replace(partial_path, output_path)
                     # Log segments
                     self.log_segments(video_name, segments)
                     print(f"Successfully trimmed {video_name}")
@@ -659,34 +1276,50 @@ class WebVideoTrimmer:
         except Exception as e:
             print(f"Error trimming video {video_name}: {e}")
             return False
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
     
     def log_segments(self, video_name, segments):
         """Log trimmed segments to CSV file."""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = [[timestamp, video_name, i+1, start, end, end - start] for i, (start, end) in enumerate(segments)]
         
-        with open(self.log_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            for i, (start, end) in enumerate(segments):
-                duration = end - start
-                writer.writerow([timestamp, video_name, i+1, start, end, duration])
+        # One writer at a time, so rows of concurrent trims never interleave
+        with self._log_lock:
+            with open(self.log_file, 'a', newline='') as f:
+                csv.writer(f).writerows(rows)
 
 def main():
-    if len(sys.argv) > 1:
-        input_dir = sys.argv[1]
-    else:
-        input_dir = "rau_so_seg_videos_redacted"
+    parser = argparse.ArgumentParser(description="Web interface for trimming videos")
+    parser.add_argument('input_dir', nargs='?', default="rau_so_seg_videos_redacted", help="Directory of videos to review")
+    parser.add_argument('--batch-size', type=int, default=5, help="Videos per batch (0 = all videos in one batch)")
+    parser.add_argument('--preview-width', type=int, default=480,
+                        help="Width of preview thumbnails in pixels (0 = full resolution)")
+    parser.add_argument('--filmstrip-frames', type=int, default=60, help="Thumbnails in each video's timeline filmstrip")
+    parser.add_argument('--filmstrip-width', type=int, default=160, help="Width of each filmstrip thumbnail in pixels")
+    parser.add_argument('--trim-workers', type=int, default=1, help="Trims run concurrently in the background")
+    parser.add_argument('--max-queued-trims', type=int, default=16, help="Trim jobs that may wait in the queue")
+    parser.add_argument('--prefetch-workers', type=int, default=4,
+                        help="Background workers preparing previews for the current and next batch (0 = off)")
+    args = parser.parse_args()
+    input_dir = args.input_dir
     
     if not os.path.exists(input_dir):
         print(f"Error: Input directory '{input_dir}' not found")
         sys.exit(1)
     
-    trimmer = WebVideoTrimmer(input_dir)
+    trimmer = WebVideoTrimmer(input_dir, batch_size=args.batch_size, prefetch_workers=args.prefetch_workers,
+                              preview_width=args.preview_width, trim_workers=args.trim_workers,
+                              max_queued_trims=args.max_queued_trims, filmstrip_frames=args.filmstrip_frames,
+                              filmstrip_width=args.filmstrip_width)
     
     # Create handler with trimmer instance
     def handler(*args, **kwargs):
         VideoTrimmerHandler(*args, trimmer=trimmer, **kwargs)
     
-    server = HTTPServer(('localhost', 8080), handler)
+    # One thread per request, so previews and status checks are served while trims run
+    server = ThreadingHTTPServer(('localhost', 8080), handler)
     
     print("="*60)
     print("Medical Video Trimmer - Web Interface")
@@ -711,6 +1344,7 @@ def main():
     except KeyboardInterrupt:
         print("\nShutting down server...")
         server.shutdown()
+        trimmer.close()
 
 if __name__ == "__main__":
     main()